@@ -0,0 +1,139 @@
+"""MongoDB-backed cache of Gemini results.
+
+Entries are keyed by (model, call site, prompt template version, normalized
+input) so resubmitting the same text returns the stored answer without an AI
+call. Bump a call site's template version whenever its prompt changes. Entries
+expire after ``AI_CACHE_TTL_SECONDS`` (TTL index) and the least recently used
+are dropped beyond ``AI_CACHE_MAX_ENTRIES``.
+"""
+import datetime
+import hashlib
+import json
+import os
+import re
+import threading
+
+ENABLED = os.environ.get('AI_CACHE', 'true').lower() not in ('0', 'false', 'no')
+TTL_SECONDS = int(os.environ.get('AI_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', '20000'))
+# Size eviction runs a count query, so only check every this many writes
+EVICT_EVERY_WRITES = 100
+
+_collection = None
+_lock = threading.Lock()
+_counters = {}      # call site -> {"hits": n, "misses": n}
+_writes = 0
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def configure(db):
+    """Point the cache at ``db.ai_cache`` and make sure its indexes exist."""
+    global _collection
+    if not ENABLED or db is None:
+        return
+    collection = db.ai_cache
+    try:
+        collection.create_index("expires_at", expireAfterSeconds=0)
+        collection.create_index("last_hit_at")
+    except Exception as e:
+        print(f"⚠️ Could not create AI cache indexes: {e}")
+    _collection = collection
+
+
+def normalize(value):
+    """Canonical text for a cache input: whitespace collapsed, dicts with sorted keys."""
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip()
+    if isinstance(value, dict):
+        return json.dumps({k: normalize(v) for k, v in value.items()}, sort_keys=True, default=str)
+    if isinstance(value, (list, tuple)):
+        return json.dumps([normalize(v) for v in value], default=str)
+    return str(value)
+
+
+def make_key(model, call_site, template_version, cache_input):
+    digest = hashlib.sha256(normalize(cache_input).encode("utf-8")).hexdigest()
+    return f"{model}:{call_site}:v{template_version}:{digest}"
+
+
+def _count(call_site, outcome):
+    with _lock:
+        _counters.setdefault(call_site, {"hits": 0, "misses": 0})[outcome] += 1
+
+
+def get(key, call_site):
+    if _collection is None:
+        return None
+    try:
+        doc = _collection.find_one_and_update(
+            {"_id": key, "expires_at": {"$gt": datetime.datetime.utcnow()}},
+            {"$set": {"last_hit_at": datetime.datetime.utcnow()}, "$inc": {"hits": 1}},
+            projection={"result": 1}
+        )
+    except Exception as e:
+        print(f"⚠️ AI cache lookup failed: {e}")
+        return None
+    _count(call_site, "hits" if doc else "misses")
+    return doc["result"] if doc else None
+
+
+def put(key, result, call_site, model):
+    global _writes
+    if _collection is None:
+        return
+    now = datetime.datetime.utcnow()
+    try:
+        _collection.replace_one(
+            {"_id": key},
+            {
+                "_id": key,
+                "result": result,
+                "call_site": call_site,
+                "model": model,
+                "created_at": now,
+                "last_hit_at": now,
+                "expires_at": now + datetime.timedelta(seconds=TTL_SECONDS),
+                "hits": 0,
+            },
+            upsert=True
+        )
+        with _lock:
+            _writes += 1
+            due = _writes % EVICT_EVERY_WRITES == 0
+        if due:
+            evict(MAX_ENTRIES)
+    except Exception as e:
+        print(f"⚠️ Could not cache AI result: {e}")
+
+
+def evict(max_entries=MAX_ENTRIES):
+    """Drop the least recently used entries beyond ``max_entries``; expired ones go by TTL."""
+    if _collection is None:
+        return 0
+    excess = _collection.count_documents({}) - max_entries
+    if excess <= 0:
+        return 0
+    stale_ids = [doc["_id"] for doc in _collection.find({}, {"_id": 1}).sort("last_hit_at", 1).limit(excess)]
+    return _collection.delete_many({"_id": {"$in": stale_ids}}).deleted_count
+
+
+def stats():
+    with _lock:
+        counters = {site: dict(counts) for site, counts in _counters.items()}
+    hits = sum(c["hits"] for c in counters.values())
+    misses = sum(c["misses"] for c in counters.values())
+    entries = None
+    if _collection is not None:
+        try:
+            entries = _collection.estimated_document_count()
+        except Exception:
+            pass
+    return {
+        "enabled": _collection is not None,
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "call_sites": counters,
+    }
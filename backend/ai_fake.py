@@ -0,0 +1,97 @@
+"""Offline stand-in for Gemini, selected with ``AI_BACKEND=fake``.
+
+Returns canned, well-formed responses for every gateway call site after a
+configurable delay and fails a configurable share of calls, so the AI-bound
+endpoints can be load-tested without network access or quota. Responses can
+be overridden per call site with a JSON file (``AI_FAKE_RESPONSES_FILE``)
+mapping call site names to a response string or a list to pick from.
+"""
+import json
+import os
+import random
+import re
+import time
+
+LATENCY_MS = float(os.environ.get('AI_FAKE_LATENCY_MS', '800'))
+LATENCY_JITTER_MS = float(os.environ.get('AI_FAKE_LATENCY_JITTER_MS', '300'))
+ERROR_RATE = float(os.environ.get('AI_FAKE_ERROR_RATE', '0'))
+RESPONSES_FILE = os.environ.get('AI_FAKE_RESPONSES_FILE')
+
+
+class ServiceUnavailable(Exception):
+    """Mirrors google.api_core's 503 error name so the gateway treats it as retryable."""
+
+
+def _batch_size(prompt):
+    match = re.search(r"JSON array of (\d+) strings", prompt)
+    return int(match.group(1)) if match else 1
+
+
+def _quoted_words(prompt, marker, count=6):
+    # A few words of the caller's input, so generated titles differ between requests
+    index = prompt.rfind(marker)
+    words = re.findall(r"[A-Za-z]{3,}", prompt[index + len(marker):] if index >= 0 else "")
+    return " ".join(words[:count]).capitalize() or "Follow up"
+
+
+def _default_response(call_site, prompt):
+    if call_site == "notes.classify":
+        return random.choice(["daily task", "project"])
+    if call_site == "notes.classify_batch":
+        return json.dumps([random.choice(["daily task", "project"]) for _ in range(_batch_size(prompt))])
+    if call_site == "notes.extract":
+        title = _quoted_words(prompt, "Meeting transcript:")
+        return json.dumps([
+            {"title": title, "description": f"{title} discussed in the meeting.",
+             "tags": ["meeting", "follow-up"], "deadline": None},
+            {"title": f"Review {title.lower()}", "description": "Review the outcome with the team.",
+             "tags": ["review"], "deadline": None},
+        ])
+    if call_site == "notes.keyword_note":
+        title = _quoted_words(prompt, "Text segment:")
+        return json.dumps({"title": title, "description": title, "deadline": None,
+                           "tags": ["Keyword-Note"], "color": "blue"})
+    if call_site == "notes.keyword_batch":
+        title = _quoted_words(prompt, "Text segments:")
+        return json.dumps([{"title": title, "description": title, "deadline": None,
+                            "tags": ["Keyword-Note"], "color": "blue"}])
+    if call_site == "projects.detect":
+        return json.dumps([{"name": _quoted_words(prompt, "Text to analyze:", 2), "confidence": 0.7,
+                            "type": "ai_detected"}])
+    if call_site == "transcription.summarize":
+        return _quoted_words(prompt, "words:", 40) + "."
+    return "ok"
+
+
+def _load_overrides():
+    if not RESPONSES_FILE:
+        return {}
+    with open(RESPONSES_FILE) as f:
+        return json.load(f)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    _overrides = None
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        if FakeGenerativeModel._overrides is None:
+            FakeGenerativeModel._overrides = _load_overrides()
+
+    def generate_content(self, prompt, call_site="unknown", timeout=None):
+        delay = max(0.0, random.gauss(LATENCY_MS, LATENCY_JITTER_MS)) / 1000
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"fake {self.model_name} timed out after {timeout:.1f}s")
+        time.sleep(delay)
+        if random.random() < ERROR_RATE:
+            raise ServiceUnavailable(f"fake {self.model_name} returned 503")
+        override = self._overrides.get(call_site)
+        if isinstance(override, list):
+            override = random.choice(override)
+        return FakeResponse(override if override is not None else _default_response(call_site, prompt))
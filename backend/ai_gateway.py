@@ -0,0 +1,252 @@
+"""Single entry point for Gemini calls.
+
+Every controller goes through ``generate`` instead of configuring the SDK and
+building its own ``GenerativeModel``. The gateway caches model handles, bounds
+in-flight calls with a process-wide semaphore, applies a per-call timeout,
+retries transient failures with jittered exponential backoff, and opens a
+circuit breaker after repeated transient or server failures so callers fail
+fast to their local fallbacks instead of tying up Flask threads on a degraded
+service.
+"""
+import os
+import random
+import threading
+import time
+
+import ai_cache
+import ai_metrics
+
+# "gemini" for the real service, "fake" for the offline stand-in in ai_fake (load tests, local development)
+BACKEND = os.environ.get('AI_BACKEND', 'gemini')
+DEFAULT_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', '8'))
+TIMEOUT_SECONDS = float(os.environ.get('AI_TIMEOUT_SECONDS', '30'))
+# How long a call may wait for a free concurrency slot before giving up
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('AI_QUEUE_TIMEOUT_SECONDS', '10'))
+MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', '2'))
+BACKOFF_BASE_SECONDS = float(os.environ.get('AI_BACKOFF_BASE_SECONDS', '0.5'))
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_COOLDOWN_SECONDS = float(os.environ.get('AI_BREAKER_COOLDOWN_SECONDS', '30'))
+
+# google.api_core exception names worth retrying; matched by name so the SDK stays a lazy import
+_RETRYABLE_ERRORS = {
+    "ResourceExhausted", "ServiceUnavailable", "DeadlineExceeded", "InternalServerError",
+    "TooManyRequests", "GatewayTimeout", "BadGateway", "TimeoutError", "ConnectionError",
+}
+
+
+class AIUnavailableError(Exception):
+    """Raised when a Gemini call can't be made or did not succeed; callers should use their fallback."""
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures; after ``cooldown`` one trial call is let through."""
+
+    def __init__(self, threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        # The trial call was abandoned before reaching the service; let the next caller try
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                if self._opened_at is None or self._trial_in_flight:
+                    print(f"⚠️ AI circuit breaker open for {self.cooldown:.0f}s after {self._failures} failures")
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+_genai = None
+_models = {}
+_models_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(max(1, MAX_CONCURRENCY))
+breaker = CircuitBreaker()
+
+
+def is_configured():
+    return BACKEND == "fake" or bool(os.getenv('GOOGLE_API_KEY'))
+
+
+def _get_genai():
+    global _genai
+    if _genai is None:
+        if not is_configured():
+            raise AIUnavailableError("GOOGLE_API_KEY environment variable not set")
+        try:
+            import google.generativeai as genai
+        except ImportError as e:
+            raise AIUnavailableError(f"google-generativeai is not installed: {e}") from e
+        genai.configure(api_key=os.getenv('GOOGLE_API_KEY'))
+        _genai = genai
+    return _genai
+
+
+def get_model(name=None):
+    """Cached ``GenerativeModel`` handle; one per model name per process."""
+    name = name or DEFAULT_MODEL
+    model = _models.get(name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(name)
+            if model is None:
+                if BACKEND == "fake":
+                    from ai_fake import FakeGenerativeModel
+                    model = FakeGenerativeModel(name)
+                else:
+                    model = _get_genai().GenerativeModel(name)
+                _models[name] = model
+    return model
+
+
+def _is_retryable(error):
+    return type(error).__name__ in _RETRYABLE_ERRORS or isinstance(error, (TimeoutError, ConnectionError))
+
+
+def _response_text(response):
+    try:
+        return (response.text or "").strip() if response else ""
+    except ValueError:
+        # .text raises when the candidate was blocked or has no parts
+        return ""
+
+
+def generate(prompt, model=None, call_site="unknown", timeout=TIMEOUT_SECONDS, retries=MAX_RETRIES,
+             cache_input=None, template_version=1, cache_if=None):
+    """Run one Gemini prompt and return the response text ("" for an empty response).
+
+    With ``cache_input`` (the variable parts of the prompt) the result is served
+    from and stored in ``ai_cache`` under the call site's ``template_version``.
+    ``cache_if(result)`` can veto storing a result the caller can't use.
+
+    Raises ``AIUnavailableError`` when the SDK isn't configured, the breaker is
+    open, no concurrency slot frees up in time, or every attempt failed.
+    """
+    model = model or DEFAULT_MODEL
+    if cache_input is None:
+        return _generate(prompt, model, call_site, timeout, retries)
+    key = ai_cache.make_key(model, call_site, template_version, cache_input)
+    cached = ai_cache.get(key, call_site)
+    if cached is not None:
+        ai_metrics.record_cache_hit(call_site, model)
+        return cached
+    result = _generate(prompt, model, call_site, timeout, retries)
+    if result and (cache_if is None or cache_if(result)):
+        ai_cache.put(key, result, call_site, model)
+    return result
+
+
+def _call_model(handle, prompt, call_site, timeout):
+    if BACKEND == "fake":
+        # The stand-in picks its canned response by call site
+        return handle.generate_content(prompt, call_site=call_site, timeout=timeout)
+    return handle.generate_content(prompt, request_options={"timeout": timeout})
+
+
+def _generate(prompt, model, call_site, timeout, retries):
+    if not breaker.allow():
+        ai_metrics.record_rejection(call_site, model, "breaker_open")
+        raise AIUnavailableError(f"AI circuit breaker is {breaker.state}; skipping {call_site}")
+    try:
+        handle = get_model(model)
+    except Exception:
+        breaker.release_trial()
+        ai_metrics.record_rejection(call_site, model, "not_configured")
+        raise
+
+    started = time.perf_counter()
+    attempt = 0
+    while True:
+        # The slot is held only for the call itself, never across a backoff sleep
+        if not _semaphore.acquire(timeout=QUEUE_TIMEOUT_SECONDS):
+            breaker.release_trial()
+            ai_metrics.record_rejection(call_site, model, "queue_timeout")
+            raise AIUnavailableError(f"No AI concurrency slot free after {QUEUE_TIMEOUT_SECONDS:.0f}s for {call_site}")
+        try:
+            response = _call_model(handle, prompt, call_site, timeout)
+        except Exception as e:
+            error = e
+        else:
+            error = None
+        finally:
+            _semaphore.release()
+
+        if error is None:
+            breaker.record_success()
+            text = _response_text(response)
+            ai_metrics.record_call(call_site, model, time.perf_counter() - started, len(prompt), len(text))
+            return text
+        retryable = _is_retryable(error)
+        if attempt < retries and retryable:
+            # Full jitter keeps retries from many threads from lining up
+            delay = random.uniform(0, BACKOFF_BASE_SECONDS * (2 ** attempt))
+            attempt += 1
+            print(f"⚠️ [AI] {call_site} failed ({type(error).__name__}), retry {attempt}/{retries} in {delay:.2f}s")
+            time.sleep(delay)
+            continue
+        if retryable:
+            breaker.record_failure()
+        else:
+            # A rejected request (bad prompt, auth, quota policy) says nothing about the service's health
+            breaker.release_trial()
+        ai_metrics.record_call(call_site, model, time.perf_counter() - started, len(prompt), error=error)
+        raise AIUnavailableError(f"{call_site} failed: {error}") from error
+
+
+def record_parse_failure(call_site, model=None):
+    """Call sites report a response they couldn't parse."""
+    ai_metrics.record_parse_failure(call_site, model or DEFAULT_MODEL)
+
+
+def record_fallback(call_site, reason, count=1, model=None):
+    """Call sites report answering from their local fallback instead of the model."""
+    ai_metrics.record_fallback(call_site, model or DEFAULT_MODEL, reason, count)
+
+
+def metrics():
+    return ai_metrics.snapshot()
+
+
+def status():
+    return {
+        "backend": BACKEND,
+        "configured": is_configured(),
+        "default_model": DEFAULT_MODEL,
+        "breaker": breaker.state,
+        "max_concurrency": MAX_CONCURRENCY,
+        "timeout_seconds": TIMEOUT_SECONDS,
+        "cached_models": sorted(_models),
+        "cache": ai_cache.stats(),
+    }
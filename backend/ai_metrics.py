@@ -0,0 +1,165 @@
+"""In-process counters and latency histograms for AI calls, per call site and model."""
+import threading
+
+# Upper bounds in seconds; the last bucket catches everything slower
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+_lock = threading.Lock()
+_series = {}    # (call_site, model) -> stats dict
+
+
+def _stats(call_site, model):
+    key = (call_site, model)
+    stats = _series.get(key)
+    if stats is None:
+        stats = {
+            "calls": 0,
+            "errors": 0,
+            "error_types": {},
+            "cache_hits": 0,
+            "rejections": {},
+            "parse_failures": 0,
+            "fallbacks": 0,
+            "fallback_reasons": {},
+            "latency_sum": 0.0,
+            "latency_max": 0.0,
+            "latency_buckets": [0] * len(LATENCY_BUCKETS),
+            "prompt_chars": 0,
+            "response_chars": 0,
+        }
+        _series[key] = stats
+    return stats
+
+
+def record_call(call_site, model, seconds, prompt_chars, response_chars=0, error=None):
+    """One request to the model (retries included), successful or not."""
+    with _lock:
+        stats = _stats(call_site, model)
+        stats["calls"] += 1
+        stats["latency_sum"] += seconds
+        stats["latency_max"] = max(stats["latency_max"], seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                stats["latency_buckets"][i] += 1
+                break
+        stats["prompt_chars"] += prompt_chars
+        stats["response_chars"] += response_chars
+        if error is not None:
+            stats["errors"] += 1
+            name = type(error).__name__
+            stats["error_types"][name] = stats["error_types"].get(name, 0) + 1
+
+
+def record_cache_hit(call_site, model):
+    with _lock:
+        _stats(call_site, model)["cache_hits"] += 1
+
+
+def record_rejection(call_site, model, reason):
+    """A call the gateway refused before reaching the model (breaker open, no concurrency slot)."""
+    with _lock:
+        rejections = _stats(call_site, model)["rejections"]
+        rejections[reason] = rejections.get(reason, 0) + 1
+
+
+def record_parse_failure(call_site, model):
+    with _lock:
+        _stats(call_site, model)["parse_failures"] += 1
+
+
+def record_fallback(call_site, model, reason, count=1):
+    with _lock:
+        stats = _stats(call_site, model)
+        stats["fallbacks"] += count
+        stats["fallback_reasons"][reason] = stats["fallback_reasons"].get(reason, 0) + count
+
+
+def _approximate_percentile(buckets, total, pct):
+    # Upper bound of the bucket holding the pct-th call
+    if not total:
+        return None
+    target = total * pct / 100
+    running = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        running += count
+        if running >= target:
+            return bound
+    return LATENCY_BUCKETS[-1]
+
+
+def snapshot():
+    with _lock:
+        series = {key: {k: (dict(v) if isinstance(v, dict) else list(v) if isinstance(v, list) else v)
+                        for k, v in stats.items()}
+                  for key, stats in _series.items()}
+    result = []
+    for (call_site, model), stats in sorted(series.items()):
+        calls = stats["calls"]
+        result.append({
+            "call_site": call_site,
+            "model": model,
+            "calls": calls,
+            "errors": stats["errors"],
+            "error_types": stats["error_types"],
+            "cache_hits": stats["cache_hits"],
+            "rejections": stats["rejections"],
+            "parse_failures": stats["parse_failures"],
+            "fallbacks": stats["fallbacks"],
+            "fallback_reasons": stats["fallback_reasons"],
+            "latency_mean_seconds": round(stats["latency_sum"] / calls, 3) if calls else None,
+            "latency_max_seconds": round(stats["latency_max"], 3),
+            "latency_p50_seconds_le": _approximate_percentile(stats["latency_buckets"], calls, 50),
+            "latency_p95_seconds_le": _approximate_percentile(stats["latency_buckets"], calls, 95),
+            "latency_buckets": {("+Inf" if bound == float("inf") else str(bound)): count
+                                for bound, count in zip(LATENCY_BUCKETS, stats["latency_buckets"])},
+            "prompt_chars": stats["prompt_chars"],
+            "response_chars": stats["response_chars"],
+        })
+    return result
+
+
+def prometheus_text():
+    """The same series in Prometheus text exposition format."""
+    lines = []
+
+    def emit(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    rows = snapshot()
+
+    def labels(row, **extra):
+        pairs = {"call_site": row["call_site"], "model": row["model"], **extra}
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs.items()) + "}"
+
+    for metric, key, help_text in (
+        ("ai_calls_total", "calls", "AI model requests"),
+        ("ai_errors_total", "errors", "AI model requests that failed"),
+        ("ai_cache_hits_total", "cache_hits", "AI results served from the cache"),
+        ("ai_parse_failures_total", "parse_failures", "AI responses the caller could not parse"),
+        ("ai_fallbacks_total", "fallbacks", "Times a caller used its local fallback"),
+        ("ai_prompt_chars_total", "prompt_chars", "Characters sent to the model"),
+        ("ai_response_chars_total", "response_chars", "Characters received from the model"),
+    ):
+        emit(metric, "counter", help_text, [f"{metric}{labels(row)} {row[key]}" for row in rows])
+
+    emit("ai_rejections_total", "counter", "AI calls refused before reaching the model",
+         [f"ai_rejections_total{labels(row, reason=reason)} {count}"
+          for row in rows for reason, count in row["rejections"].items()])
+    emit("ai_fallbacks_by_reason_total", "counter", "Local fallbacks by reason",
+         [f"ai_fallbacks_by_reason_total{labels(row, reason=reason)} {count}"
+          for row in rows for reason, count in row["fallback_reasons"].items()])
+
+    samples = []
+    with _lock:
+        sums = {key: stats["latency_sum"] for key, stats in _series.items()}
+    for row in rows:
+        running = 0
+        for bound, count in row["latency_buckets"].items():
+            running += count
+            samples.append(f"ai_latency_seconds_bucket{labels(row, le=bound)} {running}")
+        samples.append(f"ai_latency_seconds_sum{labels(row)} {sums[(row['call_site'], row['model'])]:.6f}")
+        samples.append(f"ai_latency_seconds_count{labels(row)} {row['calls']}")
+    emit("ai_latency_seconds", "histogram", "AI request latency including retries", samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,208 @@
+"""Audio decoding helpers for the transcription pipeline.
+
+Audio is decoded with ffmpeg straight to 16 kHz mono PCM, the format Whisper
+expects, and can be read in fixed-size windows so long recordings never have
+to be held in memory all at once.
+"""
+import os
+import subprocess
+import tempfile
+from bisect import bisect_left, bisect_right
+
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2  # s16le
+
+VAD_FRAME_SECONDS = 0.03
+VAD_MIN_SILENCE_SECONDS = float(os.environ.get('VAD_MIN_SILENCE_SECONDS', '0.6'))
+VAD_PADDING_SECONDS = float(os.environ.get('VAD_PADDING_SECONDS', '0.2'))
+VAD_FLOOR_DB = float(os.environ.get('VAD_FLOOR_DB', '-50'))
+VAD_MARGIN_DB = float(os.environ.get('VAD_MARGIN_DB', '10'))
+# Below this share of silence stripping is not worth the extra copy
+VAD_MIN_SILENCE_RATIO = 0.1
+
+
+def probe_duration(filepath):
+    """Duration of an audio file in seconds, or None if ffprobe can't tell."""
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", filepath],
+            capture_output=True, text=True, check=True, timeout=30
+        ).stdout.strip()
+        return float(output)
+    except (subprocess.SubprocessError, OSError, ValueError):
+        return None
+
+
+def _open_pcm_stream(filepath):
+    # stderr goes to a file: a pipe nobody reads while stdout streams could fill up and stall ffmpeg
+    stderr = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-v", "error", "-threads", "0", "-i", filepath,
+         "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE, stderr=stderr
+    )
+    process.stderr_file = stderr
+    return process
+
+
+def _close_pcm_stream(process, filepath, check):
+    """Reap ffmpeg; with ``check`` raise if it exited non-zero, quoting its stderr."""
+    try:
+        process.wait()
+        if check and process.returncode != 0:
+            process.stderr_file.seek(0)
+            detail = process.stderr_file.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg could not decode {filepath}: {detail[-500:] or f'exit code {process.returncode}'}")
+    finally:
+        process.stderr_file.close()
+
+
+def _to_float(raw):
+    # numpy is imported where it is used so API-only workers (WORKER_ROLE=api) never load it
+    import numpy as np
+    return np.frombuffer(raw, np.int16).astype(np.float32) / 32768.0
+
+
+def iter_pcm_windows(filepath, window_seconds=30.0, overlap_seconds=2.0):
+    """Yield ``(start_seconds, samples)`` windows of decoded audio in order.
+
+    Consecutive windows share ``overlap_seconds`` of audio so words cut at a
+    window edge are heard whole by one of them. Only one window is buffered.
+    """
+    window_bytes = int(window_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    overlap_bytes = int(overlap_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    if overlap_bytes >= window_bytes:
+        raise ValueError("overlap must be shorter than the window")
+
+    process = _open_pcm_stream(filepath)
+    reached_end = False
+    try:
+        carry = b""
+        start_sample = 0
+        while True:
+            needed = window_bytes - len(carry)
+            chunk = process.stdout.read(needed)
+            if not chunk:
+                reached_end = True
+                break
+            # read() may return short on a pipe; keep reading until the window fills or EOF
+            while len(chunk) < needed:
+                more = process.stdout.read(needed - len(chunk))
+                if not more:
+                    break
+                chunk += more
+            window = carry + chunk
+            yield start_sample / SAMPLE_RATE, _to_float(window)
+            if len(chunk) < needed:
+                reached_end = True
+                break
+            carry = window[-overlap_bytes:] if overlap_bytes else b""
+            start_sample += (len(window) - len(carry)) // BYTES_PER_SAMPLE
+    finally:
+        process.stdout.close()
+        if not reached_end:
+            # The consumer stopped early (or failed); ffmpeg's exit status is meaningless after a kill
+            process.kill()
+        _close_pcm_stream(process, filepath, check=reached_end)
+
+
+def load_pcm(filepath):
+    """Decode a whole file to a float32 sample array."""
+    process = _open_pcm_stream(filepath)
+    raw = process.stdout.read()
+    process.stdout.close()
+    _close_pcm_stream(process, filepath, check=True)
+    return _to_float(raw)
+
+
+class TimestampMap:
+    """Maps times in silence-stripped audio back to times in the original recording."""
+
+    def __init__(self, spans):
+        # spans: (start_sample, end_sample) of the original audio kept, in order
+        self.stripped_starts = []
+        self.original_starts = []
+        position = 0
+        for start, end in spans:
+            self.stripped_starts.append(position / SAMPLE_RATE)
+            self.original_starts.append(start / SAMPLE_RATE)
+            position += end - start
+        self.duration = position / SAMPLE_RATE
+
+    def to_original(self, seconds, end=False):
+        """Original time of ``seconds``; with ``end=True`` a time on a splice stays in the span it ends."""
+        if not self.stripped_starts:
+            return seconds
+        find = bisect_left if end else bisect_right
+        index = max(0, find(self.stripped_starts, seconds) - 1)
+        return self.original_starts[index] + (seconds - self.stripped_starts[index])
+
+
+def speech_spans(samples, min_silence_seconds=VAD_MIN_SILENCE_SECONDS, padding_seconds=VAD_PADDING_SECONDS):
+    """Energy-based voice activity detection. Returns (start_sample, end_sample) spans of speech.
+
+    A frame is voiced when its RMS level is above both an absolute floor and a
+    threshold derived from the recording's own noise floor and loud level, so
+    it adapts to quiet and noisy microphones alike. Gaps shorter than
+    ``min_silence_seconds`` are bridged and every span is padded.
+    """
+    import numpy as np
+
+    frame = int(VAD_FRAME_SECONDS * SAMPLE_RATE)
+    frame_count = len(samples) // frame
+    if frame_count == 0:
+        return [(0, len(samples))] if len(samples) else []
+
+    frames = samples[:frame_count * frame].reshape(frame_count, frame)
+    level_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    noise_floor = np.percentile(level_db, 10)
+    loud = np.percentile(level_db, 95)
+    threshold = max(VAD_FLOOR_DB, min(noise_floor + VAD_MARGIN_DB, loud - 25))
+    voiced = (level_db > threshold).astype(np.int8)
+
+    edges = np.diff(np.concatenate(([0], voiced, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+
+    min_gap = int(min_silence_seconds / VAD_FRAME_SECONDS)
+    pad = int(padding_seconds * SAMPLE_RATE)
+    spans = []
+    span_start, span_end = starts[0], ends[0]
+    for start, end in zip(starts[1:], ends[1:]):
+        if start - span_end < min_gap:
+            span_end = end
+        else:
+            spans.append((span_start, span_end))
+            span_start, span_end = start, end
+    spans.append((span_start, span_end))
+
+    result = []
+    for start, end in spans:
+        start = max(0, int(start) * frame - pad)
+        end = len(samples) if end == frame_count else min(len(samples), int(end) * frame + pad)
+        if result and start <= result[-1][1]:
+            result[-1] = (result[-1][0], end)
+        else:
+            result.append((start, end))
+    return result
+
+
+def strip_silence(samples):
+    """Drop non-speech spans. Returns ``(speech_samples, TimestampMap, stats)``."""
+    spans = speech_spans(samples)
+    kept = sum(end - start for start, end in spans)
+    stats = {
+        "original_seconds": round(float(len(samples)) / SAMPLE_RATE, 2),
+        "speech_seconds": round(float(kept) / SAMPLE_RATE, 2),
+    }
+    if len(samples) and kept > len(samples) * (1 - VAD_MIN_SILENCE_RATIO):
+        spans = [(0, len(samples))]
+        return samples, TimestampMap(spans), stats
+    if not spans:
+        return samples[:0], TimestampMap([]), stats
+    import numpy as np
+    speech = np.concatenate([samples[start:end] for start, end in spans])
+    return speech, TimestampMap(spans), stats
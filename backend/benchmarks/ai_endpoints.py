@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Load-test the AI-bound endpoints and report throughput and latency percentiles.
+
+Start the API against the offline Gemini stand-in so no quota is used, e.g.
+    AI_BACKEND=fake AI_FAKE_LATENCY_MS=800 AI_FAKE_ERROR_RATE=0.02 python main.py
+then run:
+    python benchmarks/ai_endpoints.py --endpoints notes_ai,detect --concurrency 16 --requests 200
+
+Every request sends unique text, so the AI result cache and the duplicate-note
+check don't short-circuit it; pass --repeat-payloads to measure cached paths.
+"""
+import argparse
+import itertools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+WORDS = ("budget review client launch roadmap vendor contract hiring design sprint report "
+         "invoice demo migration website campaign training audit onboarding release").split()
+
+_counter = itertools.count()
+_counter_lock = threading.Lock()
+
+
+def _sentence(seed, words=12):
+    return " ".join(WORDS[(seed * 7 + i * 3) % len(WORDS)] for i in range(words)).capitalize()
+
+
+def _transcript(seed, sentences):
+    return " ".join(f"{_sentence(seed + i)} by friday, ticket {seed}-{i}." for i in range(sentences))
+
+
+def _payload(endpoint, args):
+    with _counter_lock:
+        seed = 0 if args.repeat_payloads else next(_counter)
+    unique = "" if args.repeat_payloads else f" {uuid.uuid4().hex[:8]}"
+    if endpoint == "create_note":
+        return "POST", "/api/notes", None, {
+            "title": f"{_sentence(seed, 4)}{unique}",
+            "description": _sentence(seed + 1),
+            "user_email": args.user_email,
+            "source": args.note_source,
+        }
+    if endpoint == "notes_ai":
+        return "POST", "/api/notes/ai", None, {"text": _transcript(seed, args.sentences) + unique}
+    if endpoint == "transcriptions":
+        return "POST", "/api/transcriptions", {"user_email": args.user_email}, {
+            "content": _transcript(seed, args.sentences) + unique,
+            "language": "en-US",
+            "language_name": "English",
+        }
+    if endpoint == "detect":
+        return "POST", "/api/projects/detect", {"user_email": args.user_email}, {
+            "text": _transcript(seed, 2) + unique
+        }
+    raise ValueError(f"Unknown endpoint '{endpoint}'")
+
+
+ENDPOINTS = ("create_note", "notes_ai", "transcriptions", "detect")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_endpoint(session, endpoint, args):
+    def one_request(_):
+        method, path, params, body = _payload(endpoint, args)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, args.base_url + path, params=params, json=body, timeout=args.timeout)
+            ok = response.status_code < 500
+            status = response.status_code
+        except requests.RequestException as e:
+            ok, status = False, type(e).__name__
+        return time.perf_counter() - started, ok, status
+
+    for _ in range(args.warmup):
+        one_request(None)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(one_request, range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, ok, _ in results if ok)
+    statuses = {}
+    for _, _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    return {
+        "endpoint": endpoint,
+        "requests": len(results),
+        "errors": sum(1 for _, ok, _ in results if not ok),
+        "throughput": len(results) / elapsed if elapsed else float("nan"),
+        "p50": percentile(latencies, 50),
+        "p90": percentile(latencies, 90),
+        "p99": percentile(latencies, 99),
+        "max": latencies[-1] if latencies else float("nan"),
+        "statuses": statuses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help=f"Comma-separated subset of {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=2, help="Sequential requests per endpoint before timing")
+    parser.add_argument("--sentences", type=int, default=8, help="Transcript length for notes_ai/transcriptions")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--user-email", default="benchmark@example.com")
+    parser.add_argument("--note-source", default="manual", help="source field for create_note (manual, mic, chat)")
+    parser.add_argument("--repeat-payloads", action="store_true", help="Send identical payloads (measures cache hits)")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=args.concurrency))
+    try:
+        ai_status = session.get(args.base_url + "/api/ai/status", timeout=10).json()
+        print(f"AI backend: {ai_status.get('backend')} ({ai_status.get('default_model')}), "
+              f"max concurrency {ai_status.get('max_concurrency')}")
+    except (requests.RequestException, ValueError):
+        print("AI backend: unknown (GET /api/ai/status failed)")
+    print(f"Concurrency {args.concurrency}, {args.requests} requests per endpoint")
+    print("=" * 30)
+
+    rows = []
+    for endpoint in endpoints:
+        row = run_endpoint(session, endpoint, args)
+        rows.append(row)
+        print(f"  {endpoint:<15} done, statuses {row['statuses']}")
+
+    print(f"\n{'endpoint':<15} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for row in rows:
+        print(f"{row['endpoint']:<15} {row['throughput']:7.1f} {row['p50'] * 1000:8.0f} {row['p90'] * 1000:8.0f} "
+              f"{row['p99'] * 1000:8.0f} {row['max'] * 1000:8.0f} {row['errors']:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Compare CPU per KB of JSON for the old per-controller parse_json walk versus the shared encoder.
+
+Builds synthetic notes (with comment and version history) and transcript
+records shaped like the ones in MongoDB, then times:
+    legacy    parse_json copy walk + Flask 2.2's default json.dumps (sort_keys, default=...)
+    stdlib    serialization.py with the standard library encoder
+    orjson    serialization.py with orjson (skipped when not installed)
+
+Usage:
+    python benchmarks/json_encoding.py --notes 500 --history 20 --transcripts 200 --repeats 5
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId
+
+import serialization
+
+WORDS = ("budget review client launch roadmap vendor contract hiring design sprint report "
+         "invoice demo migration website campaign training audit onboarding release").split()
+
+
+def _text(words):
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+
+def make_note(history):
+    now = datetime.datetime.now()
+    return {
+        "_id": ObjectId(),
+        "title": _text(6),
+        "description": _text(60),
+        "color": "blue",
+        "tags": [random.choice(WORDS) for _ in range(5)],
+        "deadline": now + datetime.timedelta(days=3),
+        "type": "project",
+        "project_id": str(ObjectId()),
+        "assigned_to": ["someone@example.com"],
+        "completed": False,
+        "in_trash": False,
+        "created_at": now,
+        "updated_at": now,
+        "created_by": "someone@example.com",
+        "created_by_name": "Someone",
+        "comments": [{"id": str(ObjectId()), "text": _text(20), "author": "Someone", "timestamp": now,
+                      "parent_id": None} for _ in range(history)],
+        "versions": [{"version_id": str(ObjectId()), "timestamp": now, "title": _text(6), "description": _text(60),
+                      "tags": [random.choice(WORDS) for _ in range(5)], "deadline": now} for _ in range(history)],
+    }
+
+
+def make_transcript():
+    now = datetime.datetime.now()
+    return {
+        "_id": ObjectId(),
+        "original_content": _text(1500),
+        "processed_notes": [{"title": _text(6), "description": _text(40), "tags": [random.choice(WORDS)]}
+                            for _ in range(8)],
+        "created_by": "someone@example.com",
+        "created_at": now,
+        "updated_at": now,
+        "in_trash": False,
+    }
+
+
+def legacy_parse_json(data):
+    # The walk every controller used to run before jsonify
+    if isinstance(data, list):
+        return [legacy_parse_json(item) for item in data]
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if isinstance(value, ObjectId):
+                data[key] = str(value)
+            elif isinstance(value, datetime.datetime):
+                data[key] = value.isoformat()
+            elif isinstance(value, (dict, list)):
+                data[key] = legacy_parse_json(value)
+        return data
+    elif isinstance(data, ObjectId):
+        return str(data)
+    elif isinstance(data, datetime.datetime):
+        return data.isoformat()
+    return data
+
+
+def _flask_default(value):
+    # Flask 2.2's DefaultJSONProvider fallback for anything parse_json missed
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def legacy(payload):
+    return json.dumps(legacy_parse_json(payload), default=_flask_default, sort_keys=True).encode("utf-8")
+
+
+def stdlib(payload):
+    return serialization._stdlib_dumps(payload).encode("utf-8")
+
+
+def time_encoder(encode, documents, key, repeats):
+    best, size = float("inf"), 0
+    for _ in range(repeats):
+        # parse_json rewrites its input, so every run gets fresh documents (copied outside the timing)
+        payload = {key: copy.deepcopy(documents)}
+        started = time.process_time()
+        output = encode(payload)
+        best = min(best, time.process_time() - started)
+        size = len(output)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=500)
+    parser.add_argument("--history", type=int, default=20, help="Comments and versions per note")
+    parser.add_argument("--transcripts", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(1)
+    datasets = [
+        ("notes", [make_note(args.history) for _ in range(args.notes)]),
+        ("transcriptions", [make_transcript() for _ in range(args.transcripts)]),
+    ]
+    encoders = [("legacy", legacy), ("stdlib", stdlib)]
+    if serialization.orjson is not None:
+        encoders.append(("orjson", serialization.dumps_bytes))
+    else:
+        print("orjson not installed; skipping it")
+
+    print(f"\n{'payload':<15} {'encoder':<8} {'KB':>8} {'ms':>8} {'us/KB':>8} {'speedup':>8}")
+    for key, documents in datasets:
+        baseline = None
+        for name, encode in encoders:
+            seconds, size = time_encoder(encode, documents, key, args.repeats)
+            baseline = baseline or seconds
+            kb = size / 1024
+            print(f"{key:<15} {name:<8} {kb:8.0f} {seconds * 1000:8.1f} {seconds * 1e6 / kb:8.1f} "
+                  f"{baseline / seconds:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark Whisper real-time factor (transcription time / audio duration) per model tier and backend.
+
+Usage:
+    python benchmarks/whisper_rtf.py recording.webm --models tiny,base,small --backends default,int8 --threads 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import whisper_models
+from audio_processing import load_pcm, SAMPLE_RATE
+
+
+def benchmark(audio, models, backends, repeats):
+    duration = len(audio) / SAMPLE_RATE
+    rows = []
+    for backend in backends:
+        for name in models:
+            started = time.monotonic()
+            model = whisper_models.load_model(name, backend=backend)
+            load_seconds = time.monotonic() - started
+
+            timings = []
+            for _ in range(repeats):
+                started = time.monotonic()
+                model.transcribe(audio, **whisper_models.transcribe_options())
+                timings.append(time.monotonic() - started)
+            best = min(timings)
+            rows.append({
+                "model": name,
+                "backend": backend,
+                "load_s": load_seconds,
+                "transcribe_s": best,
+                "rtf": best / duration,
+            })
+            print(f"  {backend:<8} {name:<8} load {load_seconds:6.1f}s  transcribe {best:7.1f}s  RTF {best / duration:.3f}")
+            del model
+    return duration, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Audio file to transcribe")
+    parser.add_argument("--models", default="tiny,base,small", help="Comma-separated model tiers")
+    parser.add_argument("--backends", default="default,int8", help="Comma-separated backends (default, int8)")
+    parser.add_argument("--threads", type=int, default=whisper_models.TORCH_THREADS,
+                        help="torch intra-op threads (0 = torch default)")
+    parser.add_argument("--interop-threads", type=int, default=whisper_models.INTEROP_THREADS,
+                        help="torch inter-op threads (0 = torch default)")
+    parser.add_argument("--repeats", type=int, default=1, help="Runs per model; the fastest is reported")
+    args = parser.parse_args()
+
+    whisper_models.configure_torch_threads(args.threads, args.interop_threads)
+    audio = load_pcm(args.audio)
+    print(f"Whisper RTF benchmark: {args.audio} ({len(audio) / SAMPLE_RATE:.1f}s of audio)")
+    print("=" * 30)
+    duration, rows = benchmark(
+        audio,
+        [m.strip() for m in args.models.split(",") if m.strip()],
+        [b.strip() for b in args.backends.split(",") if b.strip()],
+        max(1, args.repeats),
+    )
+
+    print(f"\n{'model':<8} {'backend':<8} {'RTF':>7} {'x realtime':>11}")
+    for row in sorted(rows, key=lambda r: (r["model"], r["backend"])):
+        print(f"{row['model']:<8} {row['backend']:<8} {row['rtf']:7.3f} {1 / row['rtf']:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
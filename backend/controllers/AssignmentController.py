@@ -7,19 +7,6 @@ class AssignmentController:
     def __init__(self, db):
         self.notes_collection = db.notes
     
-    # Converts MongoDB objects to JSON-serializable format
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, ObjectId):
-                    data[key] = str(value)
-                elif isinstance(value, (dict, list)):
-                    data[key] = self.parse_json(value)
-            return data
-        return data
-    
     # Assigns a note to a user, only allowed by admin or note creator
     def assign_note(self, note_id):
         try:
@@ -104,9 +91,8 @@ class AssignmentController:
             if result.matched_count == 0:
                 return jsonify({"error": "Failed to update note assignment"}), 500
 
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
-            parsed_note = self.parse_json(updated_note)
-            return jsonify({"message": "Note assigned successfully", "note": parsed_note}), 200
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
+            return jsonify({"message": "Note assigned successfully", "note": updated_note}), 200
 
         except Exception as e:
             print(f"Exception in assign_note: {str(e)}")
@@ -6,19 +6,6 @@ class CommentsController:
     def __init__(self, db):
         self.notes_collection = db.notes
     
-    # Helper function to convert ObjectId to string for JSON serialization
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, ObjectId):
-                    data[key] = str(value)
-                elif isinstance(value, (dict, list)):
-                    data[key] = self.parse_json(value)
-            return data
-        return data
-    
     def add_comment(self, note_id):
         try:
             data = request.get_json()
@@ -54,16 +41,12 @@ class CommentsController:
                 return jsonify({"error": "Note not found"}), 404
             
             # Return the updated note with the new comment
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
-            
-            # Process comments to create a hierarchical structure for response
-            # (but keep them flat in the database)
-            processed_note = self.parse_json(updated_note)
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
             
             return jsonify({
                 "message": "Comment added successfully",
-                "note": processed_note,
-                "comment": self.parse_json(comment)
+                "note": updated_note,
+                "comment": comment
             }), 200
         
         except Exception as e:
@@ -95,9 +78,8 @@ class CommentsController:
                 return jsonify({"error": "Comment not found"}), 404
                 
             # Return the updated note
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
-            parsed_note = self.parse_json(updated_note)
-            return jsonify({"message": "Comment updated successfully", "note": parsed_note}), 200
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
+            return jsonify({"message": "Comment updated successfully", "note": updated_note}), 200
         
         except Exception as e:
             print(f"Error updating comment: {str(e)}")
@@ -3,6 +3,8 @@ hierarchical_mindmap_bp = Blueprint('hierarchical_mindmap', __name__)
 from bson import ObjectId
 from datetime import datetime
 
+from project_matcher import matcher_cache
+
 
 # Save the entire real estate mindmap as a single document
 @hierarchical_mindmap_bp.route('/api/real_estate_mindmap/save', methods=['POST'])
@@ -274,6 +276,8 @@ class HierarchicalMindmapController:
             # Insert the project
             result = self.db.projects.insert_one(project_doc)
             project_doc['_id'] = str(result.inserted_id)
+            # Mindmap projects have no owner, so only the all-users matcher holds them
+            matcher_cache.invalidate()
             
             return jsonify({
                 "message": "Project node saved successfully",
@@ -1,6 +1,4 @@
 from flask import request, jsonify
-from bson import ObjectId
-import datetime
 
 class MindmapController:
     def __init__(self, db, socketio=None):
@@ -8,24 +6,6 @@ class MindmapController:
         self.mindmap_collection = db.mindmap_nodes
         self.socketio = socketio
 
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, ObjectId):
-                    data[key] = str(value)
-                elif isinstance(value, datetime.datetime):
-                    data[key] = value.isoformat()
-                elif isinstance(value, (dict, list)):
-                    data[key] = self.parse_json(value)
-            return data
-        elif isinstance(data, ObjectId):
-            return str(data)
-        elif isinstance(data, datetime.datetime):
-            return data.isoformat()
-        return data
-
     def save_node(self):
         try:
             data = request.get_json()
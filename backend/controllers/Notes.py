@@ -3,10 +3,147 @@ from bson import ObjectId
 import datetime
 import json
 import os
-import google.generativeai as genai
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
 
 from controllers.CommentsController import CommentsController
 from controllers.VersionsController import VersionsController
+from note_classifier import LocalNoteClassifier
+from text_chunking import chunk_text
+from pagination import paginate, InvalidCursor
+import note_search
+import ai_gateway
+
+NOTE_TYPE_CRITERIA = """
+            Classification criteria:
+            - "daily task": Routine tasks, daily activities, short-term tasks, personal tasks, meetings, appointments, errands, quick actions, simple tasks, immediate actions, single-step tasks, routine work, daily chores, simple reminders
+            - "project": Long-term initiatives, complex tasks, multi-step processes, strategic work, ongoing initiatives, team projects, major deliverables, complex work, multi-phase work, collaborative tasks, strategic initiatives, complex deliverables
+            
+            Examples:
+            - "Call John about meeting" → daily task
+            - "Pay bills" → daily task  
+            - "Buy groceries" → daily task
+            - "Schedule dentist appointment" → daily task
+            - "Develop new website" → project
+            - "Launch marketing campaign" → project
+            - "Implement new CRM system" → project
+            - "Plan quarterly strategy" → project
+"""
+NOTE_TYPES = ("daily task", "project")
+
+# Long transcripts are split into overlapping chunks that are extracted in parallel
+EXTRACTION_CHUNK_TOKENS = int(os.environ.get('EXTRACTION_CHUNK_TOKENS', '2000'))
+EXTRACTION_CHUNK_OVERLAP_TOKENS = int(os.environ.get('EXTRACTION_CHUNK_OVERLAP_TOKENS', '200'))
+EXTRACTION_MAX_WORKERS = int(os.environ.get('EXTRACTION_MAX_WORKERS', '4'))
+# Keyword-note triggers from one user within this many seconds are extracted together (0 = one call per trigger)
+KEYWORD_NOTE_COALESCE_SECONDS = float(os.environ.get('KEYWORD_NOTE_COALESCE_SECONDS', '3'))
+# Tasks from different chunks whose titles are at least this similar are merged
+EXTRACTION_DEDUPE_SIMILARITY = float(os.environ.get('EXTRACTION_DEDUPE_SIMILARITY', '0.8'))
+
+
+def _normalized_title(task):
+    return " ".join(str(task.get("title") or "").lower().split())
+
+
+def merge_extracted_tasks(task_lists):
+    """Flatten per-chunk task lists, merging tasks with near-identical titles.
+
+    The overlap between chunks means the same item is often extracted twice;
+    the merged task keeps the longer description, the union of tags and the
+    first deadline found.
+    """
+    merged = []
+    for tasks in task_lists:
+        for task in tasks:
+            if not isinstance(task, dict):
+                continue
+            title = _normalized_title(task)
+            match = next((kept for kept in merged if title and
+                          SequenceMatcher(None, title, _normalized_title(kept)).ratio() >= EXTRACTION_DEDUPE_SIMILARITY),
+                         None)
+            if match is None:
+                merged.append(dict(task))
+                continue
+            if len(str(task.get("description") or "")) > len(str(match.get("description") or "")):
+                match["description"] = task.get("description")
+            tags = match.get("tags") or []
+            if isinstance(tags, str):
+                tags = [tags]
+            new_tags = task.get("tags") or []
+            if isinstance(new_tags, str):
+                new_tags = [new_tags]
+            match["tags"] = tags + [tag for tag in new_tags if tag not in tags]
+            if not match.get("deadline") and task.get("deadline"):
+                match["deadline"] = task.get("deadline")
+    return merged
+
+
+def _parses_as_json(text):
+    # Only cache AI answers the callers below can actually parse
+    try:
+        json.loads(text.replace('```json', '').replace('```', '').strip())
+        return True
+    except ValueError:
+        return False
+
+
+def parse_deadline(value):
+    """Deadline as stored: a datetime or None.
+
+    Every writer goes through this so deadlines share one BSON type; keyset
+    cursors compare within a type, so a string deadline would drop out of pages.
+    """
+    if isinstance(value, datetime.datetime):
+        return value
+    if value and isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return None
+
+
+# What list views show; `fields=summary` returns only these plus comment/version counts
+NOTE_SUMMARY_FIELDS = (
+    "title", "description", "color", "tags", "deadline", "type", "project_id", "assigned_to",
+    "completed", "in_trash", "created_at", "updated_at", "created_by", "created_by_name", "source",
+)
+
+
+def note_listing_projection(fields, sort_field):
+    """Mongo projection for a ``fields`` query parameter.
+
+    ``fields`` is "summary" or a comma-separated list of note fields; without
+    it notes are returned whole. The embedded ``comments``/``versions`` arrays
+    are replaced by their sizes unless explicitly requested, so Mongo never
+    ships the edit history. The search index keys are never returned.
+    """
+    if not fields or fields == "full":
+        return {"search_keys": 0}
+    if fields == "summary":
+        names = list(NOTE_SUMMARY_FIELDS)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip() and not name.strip().startswith("$")]
+    projection = {name: 1 for name in names}
+    # Keyset cursors are built from the sort field
+    projection[sort_field] = 1
+    if "comments" not in projection:
+        projection["comment_count"] = {"$size": {"$ifNull": ["$comments", []]}}
+    if "versions" not in projection:
+        projection["version_count"] = {"$size": {"$ifNull": ["$versions", []]}}
+    return projection
+
+
+# Note sources ("manual", "mic", "chat") whose notes are saved before AI classification and enriched in the
+# background. Opt-in: clients must listen for note_updated to see the final type
+ASYNC_ENRICHMENT_SOURCES = {source.strip() for source in
+                            os.environ.get('NOTE_ENRICHMENT_ASYNC_SOURCES', '').split(',') if source.strip()}
+PROVISIONAL_NOTE_TYPE = "daily task"
+_enrichment_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('NOTE_ENRICHMENT_WORKERS', '2')),
+    thread_name_prefix="note-enrichment"
+)
 
 class NotesController:
     def edit_mindmap_comment(self, note_id, comment_id):
@@ -65,15 +202,14 @@ class NotesController:
         self.db = db
         self.notes_collection = db.notes
         
-        # Initialize Gemini client
-        api_key = os.getenv('GOOGLE_API_KEY')
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.genai = genai
-        else:
+        # Gemini calls go through ai_gateway, which imports and configures the SDK on first use
+        if not ai_gateway.is_configured():
             print("Warning: GOOGLE_API_KEY environment variable not set")
-            self.genai = None
             
+        self.local_classifier = LocalNoteClassifier(db)
+        # Per (user, language) buffers of keyword segments waiting to be extracted together
+        self._keyword_batches = {}
+        self._keyword_lock = threading.Lock()
         self.comments_controller = CommentsController(db)
         self.versions_controller = VersionsController(db)
         self.socketio = socketio
@@ -82,24 +218,6 @@ class NotesController:
         if hasattr(self, 'socketio') and self.socketio:
             self.socketio.emit(event, data)
 
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, ObjectId):
-                    data[key] = str(value)
-                elif isinstance(value, datetime.datetime):
-                    data[key] = value.isoformat()
-                elif isinstance(value, (dict, list)):
-                    data[key] = self.parse_json(value)
-            return data
-        elif isinstance(data, ObjectId):
-            return str(data)
-        elif isinstance(data, datetime.datetime):
-            return data.isoformat()
-        return data
-
     def cleanup_delegated_to_field(self):
         """Remove the delegated_to field from all existing notes and populate assigned_to from projects"""
         try:
@@ -214,23 +332,28 @@ class NotesController:
             if isinstance(tags, str):
                 tags = [tags] if tags else []
             
+            source = data.get('source', 'manual')
             note_type = data.get('type')
+            type_source = 'user'
+            note_content = f"{data.get('title', '')} {data.get('description', '')}".strip()
             if not note_type:
-                note_content = f"{data.get('title', '')} {data.get('description', '')}".strip()
-                if note_content:
-                    note_type = self.classify_note_with_gemini(note_content)
-                else:
+                if not note_content:
                     note_type = 'daily task'
+                elif source in ASYNC_ENRICHMENT_SOURCES:
+                    # Only the local model runs inline; Gemini fills in the type after the note is saved
+                    note_type = self.local_classifier.classify(note_content)
+                    if note_type:
+                        type_source = 'local'
+                    else:
+                        note_type, type_source = PROVISIONAL_NOTE_TYPE, 'pending'
+                else:
+                    types, sources = self.classify_note_types([note_content])
+                    note_type, type_source = types[0], sources[0]
             
             if note_type and note_type not in tags:
                 tags.append(note_type)
             
-            deadline = data.get('deadline')
-            if deadline and isinstance(deadline, str):
-                try:
-                    deadline = datetime.datetime.fromisoformat(deadline.replace('Z', '+00:00'))
-                except ValueError:
-                    deadline = None
+            deadline = parse_deadline(data.get('deadline'))
             
             assigned_to = data.get('assigned_to', [])
             if assigned_to and isinstance(assigned_to, list):
@@ -255,6 +378,7 @@ class NotesController:
                 "tags": tags,
                 "deadline": deadline,
                 "type": note_type,
+                "type_source": type_source,
                 "project_id": data.get('project_id'),
                 "assigned_to": assigned_to,
                 "versions": [],
@@ -265,17 +389,43 @@ class NotesController:
                 "updated_at": datetime.datetime.now(),
                 "created_by": user_email,
                 "created_by_name": user_name,
-                "source": data.get('source', 'manual'),
+                "source": source,
                 "last_editor": user_email,
                 "last_editor_name": user_name
             }
-            result = self.notes_collection.insert_one(new_note)
+            result = self.notes_collection.insert_one(note_search.with_search_keys(new_note))
             new_note['_id'] = str(result.inserted_id)
-            self.emit_socket_event('note_created', {'note': self.parse_json(new_note)})
+            self.emit_socket_event('note_created', {'note': new_note})
+            if type_source == 'pending':
+                _enrichment_executor.submit(self._enrich_note, new_note['_id'], note_content)
             return jsonify({"message": "Note created successfully", "note": new_note}), 201
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    def _enrich_note(self, note_id, note_content):
+        """Classify a note saved with a provisional type, then update it and emit ``note_updated``."""
+        try:
+            types, sources = self.classify_notes_with_gemini([note_content])
+            note_type, type_source = types[0], sources[0]
+            note = self.notes_collection.find_one({"_id": ObjectId(note_id), "type_source": "pending"})
+            if not note:
+                return  # deleted, or its type was set by someone in the meantime
+            tags = [tag for tag in note.get('tags', []) if tag != note.get('type')]
+            if note_type not in tags:
+                tags.append(note_type)
+            result = self.notes_collection.update_one(
+                {"_id": ObjectId(note_id), "type_source": "pending"},
+                {"$set": {"type": note_type, "type_source": type_source, "tags": tags,
+                          "search_keys": note_search.search_keys(dict(note, tags=tags))}}
+            )
+            if result.modified_count == 0:
+                return
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
+            print(f"[AI] Enriched note {note_id} as: {note_type}")
+            self.emit_socket_event('note_updated', {'note': updated_note, 'note_id': note_id})
+        except Exception as e:
+            print(f"Note enrichment error for {note_id}: {e}")
+
     def get_notes(self):
         try:
             tag = request.args.get('tag')
@@ -371,32 +521,38 @@ class NotesController:
                 elif filter_timeframe == 'month':
                     month_start = now - datetime.timedelta(days=30)
                     query['created_at'] = {'$gte': month_start}
-            if search_query:
-                search_regex = {'$regex': search_query, '$options': 'i'}
-                query['$or'] = [
-                    {'title': search_regex},
-                    {'description': search_regex},
-                    {'tags': search_regex},
-                    {'created_by_name': search_regex}
-                ]
+            search_terms = []
+            if search_query and search_query.strip():
+                search_terms = note_search.query_terms(search_query)
+                query.update(note_search.match_filter(search_terms))
             sort_dir = 1 if sort_direction == 'asc' else -1
             valid_sort_fields = ['updated_at', 'created_at', 'deadline', 'title']
-            if sort_field not in valid_sort_fields:
+            if search_terms and request.args.get('sort_field', 'relevance') == 'relevance':
+                sort_field = 'relevance'
+            elif sort_field not in valid_sort_fields:
                 sort_field = 'updated_at'
-            notes_cursor = self.notes_collection.find(query).sort(sort_field, sort_dir)
-            notes = list(notes_cursor)
-            parsed_notes = self.parse_json(notes)
-            return jsonify({"notes": parsed_notes}), 200
+            try:
+                if sort_field == 'relevance':
+                    notes, next_cursor = note_search.ranked_page(
+                        self.notes_collection, query, search_terms,
+                        cursor=request.args.get('cursor'), limit=request.args.get('limit'),
+                        projection=note_listing_projection(request.args.get('fields'), 'updated_at'))
+                else:
+                    notes, next_cursor = paginate(self.notes_collection, query, sort_field, sort_dir,
+                                                  cursor=request.args.get('cursor'), limit=request.args.get('limit'),
+                                                  projection=note_listing_projection(request.args.get('fields'), sort_field))
+            except InvalidCursor as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({"notes": notes, "next_cursor": next_cursor}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
     def get_note(self, note_id):
         try:
-            note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
+            note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
             if not note:
                 return jsonify({"error": "Note not found"}), 404
-            parsed_note = self.parse_json(note)
-            return jsonify({"note": parsed_note}), 200
+            return jsonify({"note": note}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -419,8 +575,13 @@ class NotesController:
                 if field in data:
                     if field == 'assigned_to' and data['assigned_to'] and isinstance(data['assigned_to'], list):
                         update_data[field] = [assignee.strip() for assignee in data['assigned_to'] if assignee.strip()]
+                    elif field == 'deadline':
+                        update_data[field] = parse_deadline(data['deadline'])
                     else:
                         update_data[field] = data[field]
+            if 'type' in data:
+                # A type set by a person is a training label for the local classifier
+                update_data['type_source'] = 'user'
             
             # Auto-populate assigned_to from project if project_id is being updated and assigned_to is not explicitly set
             if 'project_id' in data and 'assigned_to' not in data:
@@ -438,11 +599,12 @@ class NotesController:
             )
             if result.matched_count == 0:
                 return jsonify({"error": "Note not found"}), 404
+            if any(field in update_data for field in note_search.SEARCH_FIELDS):
+                note_search.refresh(self.notes_collection, ObjectId(note_id))
             
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
-            parsed_note = self.parse_json(updated_note)
-            self.emit_socket_event('note_updated', {'note': parsed_note, 'note_id': note_id})
-            return jsonify({"message": "Note updated successfully", "note": parsed_note}), 200
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
+            self.emit_socket_event('note_updated', {'note': updated_note, 'note_id': note_id})
+            return jsonify({"message": "Note updated successfully", "note": updated_note}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -502,7 +664,7 @@ class NotesController:
                 {"_id": ObjectId(note_id)},
                 {"$set": {"completed": new_status, "updated_at": datetime.datetime.now()}}
             )
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
             return jsonify({
                 "message": f"Note marked as {'completed' if new_status else 'incomplete'}",
                 "completed": new_status
@@ -520,39 +682,27 @@ class NotesController:
         return self.versions_controller.rollback_note(note_id, version_id)
 
     def classify_note_with_gemini(self, note_content):
+        """Returns ``(note_type, source)``; source is "fallback" when Gemini didn't answer."""
         try:
             # Check if Gemini is properly initialized
-            if not self.genai:
+            if not ai_gateway.is_configured():
                 print("[Warning] Gemini not initialized, skipping classification")
-                return "daily task"  # Default classification
+                ai_gateway.record_fallback("notes.classify", "not_configured")
+                return self._fallback_note_type(note_content), "fallback"
                 
             prompt = f"""
             Analyze the following note content and classify it as either "daily task" or "project".
-            
-            Classification criteria:
-            - "daily task": Routine tasks, daily activities, short-term tasks, personal tasks, meetings, appointments, errands, quick actions, simple tasks, immediate actions, single-step tasks, routine work, daily chores, simple reminders
-            - "project": Long-term initiatives, complex tasks, multi-step processes, strategic work, ongoing initiatives, team projects, major deliverables, complex work, multi-phase work, collaborative tasks, strategic initiatives, complex deliverables
-            
-            Examples:
-            - "Call John about meeting" → daily task
-            - "Pay bills" → daily task  
-            - "Buy groceries" → daily task
-            - "Schedule dentist appointment" → daily task
-            - "Develop new website" → project
-            - "Launch marketing campaign" → project
-            - "Implement new CRM system" → project
-            - "Plan quarterly strategy" → project
-            
+            {NOTE_TYPE_CRITERIA}
             Note content: "{note_content}"
             
             Respond with ONLY one word: "daily task" or "project"
             """
             
-            model = self.genai.GenerativeModel('gemini-2.0-flash')
-            response = model.generate_content(prompt)
+            ai_response = ai_gateway.generate(prompt, call_site="notes.classify",
+                                              cache_input=note_content, template_version=1)
             
-            if response and response.text:
-                classification = response.text.strip().lower()
+            if ai_response:
+                classification = ai_response.lower()
                 print(f"[AI] Raw classification response: '{classification}'")
                 
                 # Clean up the response to handle potential formatting issues
@@ -561,16 +711,95 @@ class NotesController:
                 
                 # Check for project keyword anywhere in the response
                 if "project" in classification:
-                    return "project"
+                    return "project", "gemini"
                 else:
-                    return "daily task"
+                    return "daily task", "gemini"
             else:
                 print("[AI] No classification response received, using default")
-                return "daily task"
+                ai_gateway.record_fallback("notes.classify", "empty_response")
+                return "daily task", "fallback"
                 
         except Exception as e:
             print(f"Note classification error: {e}")
-            return "daily task"
+            ai_gateway.record_fallback("notes.classify", "error")
+            return self._fallback_note_type(note_content), "fallback"
+
+    def _fallback_note_type(self, note_content):
+        # Without Gemini, the local model's best guess beats a fixed default
+        return self.local_classifier.classify(note_content, threshold=0.0) or "daily task"
+
+    def classify_notes_with_gemini(self, note_contents):
+        """Classify several notes with one Gemini call. Returns ``(types, sources)``, one entry per note, in order.
+
+        Entries the batch response doesn't cover with a valid type fall back to
+        ``classify_note_with_gemini`` one by one. A source is "gemini" only when
+        Gemini chose the type and "fallback" for defaults and local guesses.
+        """
+        types = ["daily task" if not (content or "").strip() else None for content in note_contents]
+        sources = ["fallback" if note_type else "gemini" for note_type in types]
+        pending = [i for i, note_type in enumerate(types) if note_type is None]
+        if not pending:
+            return types, sources
+        if len(pending) == 1 or not ai_gateway.is_configured():
+            for i in pending:
+                types[i], sources[i] = self.classify_note_with_gemini(note_contents[i])
+            return types, sources
+
+        items = "\n".join(f'{n}. "{note_contents[i].strip()}"' for n, i in enumerate(pending, 1))
+        prompt = f"""
+            Analyze each of the following numbered notes and classify it as either "daily task" or "project".
+            {NOTE_TYPE_CRITERIA}
+            Notes:
+            {items}
+
+            Respond with ONLY a JSON array of {len(pending)} strings, one per note in the same order, each "daily task" or "project".
+            """
+        parsed = []
+        try:
+            ai_response = ai_gateway.generate(prompt, call_site="notes.classify_batch",
+                                              cache_input=[note_contents[i] for i in pending], template_version=1,
+                                              cache_if=_parses_as_json)
+            parsed = json.loads(ai_response.replace('```json', '').replace('```', '').strip())
+            if not isinstance(parsed, list):
+                raise ValueError("AI did not return a list")
+        except ai_gateway.AIUnavailableError as e:
+            # The service itself is failing; one call per note would only fail more slowly
+            print(f"[AI] Batch classification unavailable, using local fallback: {e}")
+            ai_gateway.record_fallback("notes.classify_batch", "unavailable", count=len(pending))
+            for i in pending:
+                types[i], sources[i] = self._fallback_note_type(note_contents[i]), "fallback"
+            return types, sources
+        except Exception as e:
+            print(f"[AI] Batch classification failed, classifying one by one: {e}")
+            ai_gateway.record_parse_failure("notes.classify_batch")
+            parsed = []
+        print(f"[AI] Batch classified {len(pending)} notes: {parsed}")
+
+        for n, i in enumerate(pending):
+            label = parsed[n].strip().lower() if n < len(parsed) and isinstance(parsed[n], str) else None
+            if label in NOTE_TYPES:
+                types[i] = label
+            else:
+                types[i], sources[i] = self.classify_note_with_gemini(note_contents[i])
+        return types, sources
+
+    def classify_note_types(self, note_contents):
+        """Classify notes with the local model first and Gemini for the rest.
+
+        Returns ``(types, sources)`` where each source is "local", "gemini" or
+        "fallback" (Gemini unavailable or empty content; never trained on).
+        """
+        types, sources = [], []
+        for content in note_contents:
+            note_type = self.local_classifier.classify(content) if (content or "").strip() else None
+            types.append(note_type)
+            sources.append("local" if note_type else None)
+        remote = [i for i, note_type in enumerate(types) if note_type is None]
+        if remote:
+            remote_types, remote_sources = self.classify_notes_with_gemini([note_contents[i] for i in remote])
+            for i, note_type, source in zip(remote, remote_types, remote_sources):
+                types[i], sources[i] = note_type, source
+        return types, sources
 
     def ai(self):
         from flask import request, jsonify
@@ -583,12 +812,8 @@ class NotesController:
         
         return self._process_ai_extraction(text, user_email, user_name)
     
-    def _process_ai_extraction(self, text, user_email='meeting_ai', user_name='Meeting AI'):
-        import json
-        db = self.db
-
-        print(f"[AI] Received text: {text[:100]}...")
-
+    def _extract_tasks(self, text):
+        """Ask Gemini for the actionable items in one piece of transcript. Returns a list of task dicts."""
         prompt = f"""
         You are an assistant that extracts actionable items, plans, events, or intentions from any conversation or meeting transcript. 
         This includes work tasks, personal plans, social events, errands, or anything the speaker intends to do.
@@ -630,18 +855,14 @@ class NotesController:
         {text}
         """
 
-        # Check if Gemini is properly initialized
-        if self.genai is None:
-            print("[AI] Gemini not initialized, cannot process extraction")
-            return jsonify({"error": "AI service not available"}), 500
-            
         try:
             # Use Gemini for content generation
-            model = self.genai.GenerativeModel('gemini-2.0-flash')
-            response = model.generate_content(prompt)
-            ai_response = response.text.strip() if response.text else ""
+            ai_response = ai_gateway.generate(prompt, call_site="notes.extract",
+                                              cache_input=text, template_version=1,
+                                              cache_if=lambda r: _parses_as_json(r.replace("'", '"')))
         except Exception as e:
             print(f"[AI] Gemini processing error: {e}")
+            ai_gateway.record_fallback("notes.extract", "error")
             ai_response = ""
             
         if ai_response:
@@ -663,13 +884,44 @@ class NotesController:
                 raise ValueError("AI did not return a list")
         except Exception as e:
             print(f"[AI] Extraction failed: {e}")
+            if ai_response:
+                ai_gateway.record_parse_failure("notes.extract")
             tasks = []
+        return tasks
+
+    def _extract_tasks_chunked(self, text):
+        """Extract tasks from overlapping token-bounded chunks in parallel and merge them."""
+        chunks = chunk_text(text, EXTRACTION_CHUNK_TOKENS, EXTRACTION_CHUNK_OVERLAP_TOKENS) or [text]
+        if len(chunks) == 1:
+            return self._extract_tasks(text)
+        print(f"[AI] Extracting from {len(chunks)} chunks of ~{EXTRACTION_CHUNK_TOKENS} tokens")
+        with ThreadPoolExecutor(max_workers=min(EXTRACTION_MAX_WORKERS, len(chunks))) as executor:
+            task_lists = list(executor.map(self._extract_tasks, chunks))
+        return merge_extracted_tasks(task_lists)
+
+    def _process_ai_extraction(self, text, user_email='meeting_ai', user_name='Meeting AI'):
+        import json
+        db = self.db
+
+        print(f"[AI] Received text: {text[:100]}...")
+
+        # Check if Gemini is properly initialized
+        if not ai_gateway.is_configured():
+            print("[AI] Gemini not initialized, cannot process extraction")
+            return jsonify({"error": "AI service not available"}), 500
+
+        tasks = self._extract_tasks_chunked(text)
         print(f"[AI] Extracted tasks: {tasks}")
 
         preview_notes = []
         saved_notes = []
+
+        # One classification call for every extracted task instead of one per task
+        task_types, type_sources = self.classify_note_types([
+            f"{task.get('title', '')} {task.get('description', '')}".strip() for task in tasks
+        ])
         
-        for task in tasks:
+        for task, note_type, type_source in zip(tasks, task_types, type_sources):
             tags = task.get("tags", [])
             if isinstance(tags, str):
                 tags = [tags] if tags else []
@@ -683,12 +935,7 @@ class NotesController:
             else:
                 deadline_dt = None
             
-            note_content = f"{task.get('title', '')} {task.get('description', '')}".strip()
-            if note_content:
-                note_type = self.classify_note_with_gemini(note_content)
-                print(f"[AI] Classified note '{task.get('title', '')}' as: {note_type}")
-            else:
-                note_type = "daily task"
+            print(f"[AI] Classified note '{task.get('title', '')}' as: {note_type}")
             
             if note_type and note_type not in tags:
                 tags.append(note_type)
@@ -723,6 +970,7 @@ class NotesController:
                 "color": task.get("color", "blue"),
                 "deadline": deadline_dt,
                 "type": note_type,
+                "type_source": type_source,
                 "project_id": None,
                 "assigned_to": [],
                 "delegated_to": [],
@@ -745,17 +993,183 @@ class NotesController:
             "message": f"Extracted {len(preview_notes)} notes from text"
         }), 200
 
+    def _parse_keyword_deadline(self, deadline):
+        if deadline and isinstance(deadline, str):
+            try:
+                return datetime.datetime.strptime(deadline, '%Y-%m-%d')
+            except ValueError:
+                return None
+        return None
+
+    def _keyword_note_doc(self, data, title, description, deadline, tags, color, note_type, type_source):
+        user_email = data.get('user_email', '')
+        user_name = data.get('user_name', '')
+        return {
+            "_id": ObjectId(),
+            "title": title,
+            "description": description,
+            "deadline": deadline,
+            "tags": tags,
+            "color": color,
+            "type": note_type,
+            "type_source": type_source,
+            "project_id": None,
+            "assigned_to": [],
+            "delegated_to": [],
+            "created_by": user_email,
+            "created_by_name": user_name,
+            "trigger_type": data.get('trigger_type', 'keyword'),
+            "source_text": data.get('text'),
+            "language": data.get('language', 'en-US'),
+            "language_name": data.get('language_name', 'English'),
+            "source": "mic",
+            "created_at": datetime.datetime.now(),
+            "updated_at": datetime.datetime.now(),
+            "completed": False,
+            "in_trash": False,
+            "versions": [],
+            "comments": [],
+            "last_editor": user_email,
+            "last_editor_name": user_name
+        }
+
+    def _queue_keyword_segment(self, data):
+        """Buffer a keyword segment; the user's buffer is flushed as one extraction after the coalescing window."""
+        key = (data.get('user_email', ''), data.get('language', 'en-US'))
+        text = data.get('text').strip()
+        with self._keyword_lock:
+            batch = self._keyword_batches.get(key)
+            if batch is None:
+                batch = {"batch_id": str(ObjectId()), "segments": [], "data": data}
+                self._keyword_batches[key] = batch
+                timer = threading.Timer(KEYWORD_NOTE_COALESCE_SECONDS, self._flush_keyword_batch, args=(key,))
+                timer.daemon = True
+                timer.start()
+            # Overlapping triggers often resend the same sentence
+            if text not in batch["segments"]:
+                batch["segments"].append(text)
+            segment_count = len(batch["segments"])
+        return jsonify({
+            "message": "Keyword segment queued",
+            "batch_id": batch["batch_id"],
+            "segments": segment_count,
+            "flush_in_seconds": KEYWORD_NOTE_COALESCE_SECONDS
+        }), 202
+
+    def _flush_keyword_batch(self, key):
+        with self._keyword_lock:
+            batch = self._keyword_batches.pop(key, None)
+        if not batch:
+            return
+        data = dict(batch["data"], text="\n".join(batch["segments"]))
+        user_email = data.get('user_email', '')
+        try:
+            notes = self._keyword_batch_notes(data, batch["segments"])
+            if notes:
+                self.notes_collection.insert_many([note_search.with_search_keys(note) for note in notes])
+            print(f"[AI] Keyword batch {batch['batch_id']}: {len(batch['segments'])} segments -> {len(notes)} notes")
+            self.emit_socket_event('keyword_notes_created', {
+                'batch_id': batch["batch_id"],
+                'notes': notes,
+                'user': user_email
+            })
+        except Exception as e:
+            print(f"Keyword batch {batch['batch_id']} failed: {e}")
+            self.emit_socket_event('keyword_notes_created', {
+                'batch_id': batch["batch_id"], 'notes': [], 'user': user_email, 'error': str(e)
+            })
+
+    def _keyword_batch_notes(self, data, segments):
+        """One extraction over all buffered segments. Returns unsaved note documents."""
+        language_name = data.get('language_name', 'English')
+        meeting_date = datetime.datetime.now().strftime('%Y-%m-%d')
+        numbered = "\n".join(f'{n}. "{segment}"' for n, segment in enumerate(segments, 1))
+        prompt = f"""
+You are processing text segments that were flagged by keyword triggers (like "notes", "remember", "important", etc.)
+within a few seconds of each other while the user was speaking. Segments may repeat or continue one another.
+The user wants to capture this information as notes.
+
+Text segments:
+{numbered}
+
+Create one note per distinct task, action item, important fact, decision, commitment, contact detail, deadline or appointment, with:
+1. A clear, descriptive title
+2. Essential details in the description
+3. Relevant tags (include project names, user names, technologies, locations, categories)
+4. A suitable color
+5. Deadline if mentioned (YYYY-MM-DD format)
+
+Note: Do NOT include a "type" field in your response. The note type will be automatically classified by our system.
+
+Output MUST be ONLY a valid JSON array with no additional text, for example:
+[
+  {{
+    "title": "Clear note title",
+    "description": "Essential details from the text segments",
+    "deadline": "YYYY-MM-DD or null",
+    "tags": ["Keyword-Note", "Relevant", "Categories", "Project-Name", "User-Name"],
+    "color": "blue"
+  }}
+]
+
+If nothing is actionable or important, return [].
+
+Today's date is {meeting_date}.
+Language context: {language_name}
+"""
+        try:
+            ai_response = ai_gateway.generate(
+                prompt, call_site="notes.keyword_batch", template_version=1,
+                cache_input={"segments": segments, "language_name": language_name, "date": meeting_date},
+                cache_if=_parses_as_json
+            )
+            note_items = json.loads(ai_response.replace('```json', '').replace('```', '').strip())
+            if not isinstance(note_items, list):
+                raise ValueError("AI did not return a list")
+        except Exception as e:
+            # Keep what was said rather than losing it
+            print(f"[AI] Keyword batch extraction failed, saving raw segments: {e}")
+            if not isinstance(e, ai_gateway.AIUnavailableError):
+                ai_gateway.record_parse_failure("notes.keyword_batch")
+            ai_gateway.record_fallback("notes.keyword_batch", "raw_segments")
+            note_items = [{
+                "title": f"Keyword Note ({language_name})",
+                "description": data['text'],
+                "tags": ["Keyword-Note", language_name]
+            }]
+        note_items = merge_extracted_tasks([note_items])
+
+        types, sources = self.classify_note_types([
+            f"{item.get('title', '')} {item.get('description', '')}".strip() for item in note_items
+        ])
+        notes = []
+        for item, note_type, type_source in zip(note_items, types, sources):
+            tags = item.get('tags') or ['Keyword-Note', language_name]
+            if isinstance(tags, str):
+                tags = [tags]
+            if note_type and note_type not in tags:
+                tags.append(note_type)
+            notes.append(self._keyword_note_doc(
+                data,
+                title=item.get('title') or f'Keyword Note ({language_name})',
+                description=item.get('description') or data['text'],
+                deadline=self._parse_keyword_deadline(item.get('deadline')),
+                tags=tags,
+                color=item.get('color', 'blue'),
+                note_type=note_type,
+                type_source=type_source
+            ))
+        return notes
+
     def keyword_note(self):
         try:
             data = request.get_json()
             if not data.get('text'):
                 return jsonify({"error": "Text is required"}), 400
+            if KEYWORD_NOTE_COALESCE_SECONDS > 0 and data.get('coalesce', True) is not False:
+                return self._queue_keyword_segment(data)
             text = data.get('text')
-            language = data.get('language', 'en-US')
             language_name = data.get('language_name', 'English')
-            user_email = data.get('user_email', '')
-            user_name = data.get('user_name', '')
-            trigger_type = data.get('trigger_type', 'keyword')
             meeting_date = datetime.datetime.now().strftime('%Y-%m-%d')
             prompt = f"""
 You are processing a text segment that was flagged by a keyword trigger (like "notes", "remember", "important", etc.).
@@ -804,14 +1218,16 @@ Today's date is {meeting_date}.
 Language context: {language_name}
 """
             # Check if Gemini is properly initialized
-            if not self.genai:
+            if not ai_gateway.is_configured():
                 print("[Warning] Gemini not initialized, skipping AI processing")
                 return jsonify({"error": "AI service not available"}), 500
                 
             try:
-                model = self.genai.GenerativeModel('gemini-1.5-flash')
-                response = model.generate_content(prompt)
-                ai_response = response.text
+                ai_response = ai_gateway.generate(
+                    prompt, call_site="notes.keyword_note", template_version=1,
+                    cache_input={"text": text, "language_name": language_name, "date": meeting_date},
+                    cache_if=_parses_as_json
+                )
             except Exception as e:
                 print(f"[Error] Gemini processing error: {e}")
                 return jsonify({"error": "Error processing with AI service"}), 500
@@ -826,86 +1242,46 @@ Language context: {language_name}
                 
                 tags = note_data.get('tags', ['Keyword-Note', language_name])
                 note_content = f"{note_data.get('title', '')} {note_data.get('description', '')}".strip()
-                if note_content:
-                    note_type = self.classify_note_with_gemini(note_content)
-                else:
-                    note_type = "daily task"
+                types, sources = self.classify_note_types([note_content])
+                note_type, type_source = types[0], sources[0]
                 
                 if note_type and note_type not in tags:
                     tags.append(note_type)
                 
-                deadline = note_data.get('deadline')
-                if deadline and isinstance(deadline, str):
-                    try:
-                        deadline_dt = datetime.datetime.strptime(deadline, '%Y-%m-%d')
-                    except ValueError:
-                        deadline_dt = None
-                else:
-                    deadline_dt = None
+                deadline_dt = self._parse_keyword_deadline(note_data.get('deadline'))
                 
-                enhanced_note = {
-                    "_id": ObjectId(),
-                    "title": note_data.get('title', f'Keyword Note ({language_name})'),
-                    "description": note_data.get('description', text),
-                    "deadline": deadline_dt,
-                    "tags": tags,
-                    "color": note_data.get('color', 'blue'),
-                    "type": note_type,
-                    "project_id": None,
-                    "assigned_to": [],
-                    "delegated_to": [],
-                    "created_by": user_email,
-                    "created_by_name": user_name,
-                    "trigger_type": trigger_type,
-                    "source_text": text,
-                    "language": language,
-                    "language_name": language_name,
-                    "source": "mic",
-                    "created_at": datetime.datetime.now(),
-                    "updated_at": datetime.datetime.now(),
-                    "completed": False,
-                    "in_trash": False,
-                    "versions": [],
-                    "comments": [],
-                    "last_editor": user_email,
-                    "last_editor_name": user_name
-                }
-                result = self.notes_collection.insert_one(enhanced_note)
+                enhanced_note = self._keyword_note_doc(
+                    data,
+                    title=note_data.get('title', f'Keyword Note ({language_name})'),
+                    description=note_data.get('description', text),
+                    deadline=deadline_dt,
+                    tags=tags,
+                    color=note_data.get('color', 'blue'),
+                    note_type=note_type,
+                    type_source=type_source
+                )
+                result = self.notes_collection.insert_one(note_search.with_search_keys(enhanced_note))
                 enhanced_note['_id'] = str(result.inserted_id)
-                return jsonify({"note": self.parse_json(enhanced_note)}), 200
+                return jsonify({"note": enhanced_note}), 200
             except json.JSONDecodeError:
+                ai_gateway.record_parse_failure("notes.keyword_note")
+                ai_gateway.record_fallback("notes.keyword_note", "raw_text")
                 note_content = f"Keyword Note ({language_name}): {text}"
-                note_type = self.classify_note_with_gemini(note_content)
+                types, sources = self.classify_note_types([note_content])
+                note_type, type_source = types[0], sources[0]
                 tags = ["Keyword-Note", language_name, note_type]
-                simple_note = {
-                    "_id": ObjectId(),
-                    "title": f"Keyword Note ({language_name})",
-                    "description": text,
-                    "deadline": None,
-                    "tags": tags,
-                    "color": "blue",
-                    "type": note_type,
-                    "project_id": None,
-                    "assigned_to": [],
-                    "delegated_to": [],
-                    "created_by": user_email,
-                    "created_by_name": user_name,
-                    "trigger_type": trigger_type,
-                    "source_text": text,
-                    "language": language,
-                    "language_name": language_name,
-                    "source": "mic",
-                    "created_at": datetime.datetime.now(),
-                    "updated_at": datetime.datetime.now(),
-                    "completed": False,
-                    "in_trash": False,
-                    "versions": [],
-                    "comments": [],
-                    "last_editor": user_email,
-                    "last_editor_name": user_name
-                }
-                result = self.notes_collection.insert_one(simple_note)
+                simple_note = self._keyword_note_doc(
+                    data,
+                    title=f"Keyword Note ({language_name})",
+                    description=text,
+                    deadline=None,
+                    tags=tags,
+                    color="blue",
+                    note_type=note_type,
+                    type_source=type_source
+                )
+                result = self.notes_collection.insert_one(note_search.with_search_keys(simple_note))
                 simple_note['_id'] = str(result.inserted_id)
-                return jsonify({"note": self.parse_json(simple_note)}), 200
+                return jsonify({"note": simple_note}), 200
         except Exception as e:
             return jsonify({"error": f"Keyword note processing failed: {str(e)}"}), 500
\ No newline at end of file
@@ -1,6 +1,15 @@
 from flask import request, jsonify
 from bson import ObjectId
 import datetime
+import os
+import ai_gateway
+from project_matcher import matcher_cache
+from pagination import paginate, InvalidCursor
+from controllers.Notes import note_listing_projection, _parses_as_json
+
+# Exact word-boundary matches covering at least this share of the text make the Gemini call unnecessary
+PROJECT_DETECT_AI_SKIP_COVERAGE = float(os.environ.get('PROJECT_DETECT_AI_SKIP_COVERAGE', '0.5'))
+
 
 class ProjectController:
     def __init__(self, db, socketio=None):
@@ -9,22 +18,6 @@ class ProjectController:
         self.people_collection = db.people
         self.socketio = socketio
 
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            return {
-                key: self.parse_json(value)
-                if isinstance(value, (dict, list, ObjectId, datetime.datetime))
-                else value
-                for key, value in data.items()
-            }
-        elif isinstance(data, ObjectId):
-            return str(data)
-        elif isinstance(data, datetime.datetime):
-            return data.isoformat()
-        return data
-
     def _create_person(self, name, email=None):
         name = name.strip() if name else ''
         email = email.strip() if email else None
@@ -88,11 +81,12 @@ class ProjectController:
             }
             result = self.projects_collection.insert_one(new_project)
             new_project['_id'] = str(result.inserted_id)
+            matcher_cache.invalidate(user_email)
 
             if self.socketio:
-                self.socketio.emit('project_created', {'project': self.parse_json(new_project)})
+                self.socketio.emit('project_created', {'project': new_project})
 
-            return jsonify({"message": "Project created successfully", "project": self.parse_json(new_project)}), 201
+            return jsonify({"message": "Project created successfully", "project": new_project}), 201
 
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -104,7 +98,7 @@ class ProjectController:
             if user_email:
                 query.update({"created_by": user_email})  # pylint: disable=no-member
             projects = list(self.projects_collection.find(query).sort("created_at", -1))
-            return jsonify({"projects": self.parse_json(projects)})
+            return jsonify({"projects": projects})
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -113,7 +107,26 @@ class ProjectController:
             project = self.projects_collection.find_one({"_id": ObjectId(project_id)})
             if not project:
                 return jsonify({"error": "Project not found"}), 404
-            return jsonify({"project": self.parse_json(project)})
+            return jsonify({"project": project})
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    def get_project_notes(self, project_id):
+        try:
+            if not self.projects_collection.find_one({"_id": ObjectId(project_id)}, {"_id": 1}):
+                return jsonify({"error": "Project not found"}), 404
+            sort_field = request.args.get("sort_field", "updated_at")
+            if sort_field not in ("updated_at", "created_at", "deadline", "title"):
+                sort_field = "updated_at"
+            sort_dir = 1 if request.args.get("sort_direction") == "asc" else -1
+            query = {"project_id": project_id, "in_trash": False}
+            try:
+                notes, next_cursor = paginate(self.db.notes, query, sort_field, sort_dir,
+                                              cursor=request.args.get("cursor"), limit=request.args.get("limit"),
+                                              projection=note_listing_projection(request.args.get("fields"), sort_field))
+            except InvalidCursor as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify({"notes": notes, "next_cursor": next_cursor}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -127,108 +140,95 @@ class ProjectController:
             if not text:
                 return jsonify({"error": "Text is required"}), 400
             
-            # Get all projects from database
+            # Compiled matcher over the user's project names, cached until their projects change
             user_email = request.args.get('user_email')
             query = {"in_trash": False}
             if user_email:
                 query["created_by"] = user_email
-            
-            projects = list(self.projects_collection.find(query))
-            
-            detected_projects = []
-            text_lower = text.lower()
+            matcher = matcher_cache.get(
+                user_email, lambda: list(self.projects_collection.find(query, {"name": 1}))
+            )
+            projects = matcher.projects
             
             # Direct database matching
-            for project in projects:
-                project_name = project['name'].lower()
-                if project_name in text_lower:
-                    # Calculate confidence based on context
-                    confidence = 0.9 if f" {project_name} " in text_lower else 0.8
-                    detected_projects.append({
-                        "name": project['name'],
-                        "id": str(project['_id']),
-                        "confidence": confidence,
-                        "type": "exact_match"
-                    })
+            detected_projects, coverage = matcher.match(text)
             
-            # AI-based detection for potential project names
-            try:
-                import google.generativeai as genai
-                import os
-                
-                # Initialize Gemini client
-                api_key = os.getenv('GOOGLE_API_KEY')
-                if not api_key:
-                    raise ValueError("GOOGLE_API_KEY environment variable not set")
-                
-                genai.configure(api_key=api_key)
-                
-                existing_names = [p['name'] for p in projects]
-                prompt = f"""
-                Analyze the following text and identify potential project names or references that might be mentioned.
-                
-                Existing projects in database: {existing_names}
+            # AI-based detection for potential project names, unless exact matches already cover the text
+            if coverage >= PROJECT_DETECT_AI_SKIP_COVERAGE:
+                print(f"[AI] Project detection skipped, exact matches cover {coverage:.0%} of the text")
+            else:
+                try:
+                    existing_names = [p['name'] for p in projects]
+                    prompt = f"""
+                    Analyze the following text and identify potential project names or references that might be mentioned.
                 
-                Text to analyze: "{text}"
+                    Existing projects in database: {existing_names}
                 
-                Look for:
-                - Proper nouns that could be project names
-                - References to initiatives, campaigns, or systems
-                - Names of products, platforms, or services
-                - Any capitalized terms that seem like project identifiers
+                    Text to analyze: "{text}"
                 
-                Return only a JSON array of potential project names with confidence scores (0.0-1.0).
-                Format: [{"name": "Project Name", "confidence": 0.8, "type": "ai_detected"}]
+                    Look for:
+                    - Proper nouns that could be project names
+                    - References to initiatives, campaigns, or systems
+                    - Names of products, platforms, or services
+                    - Any capitalized terms that seem like project identifiers
                 
-                If no potential projects found, return an empty array: []
-                """
+                    Return only a JSON array of potential project names with confidence scores (0.0-1.0).
+                    Format: [{{"name": "Project Name", "confidence": 0.8, "type": "ai_detected"}}]
                 
-                model = genai.GenerativeModel('gemini-1.5-flash')
-                response = model.generate_content(prompt)
+                    If no potential projects found, return an empty array: []
+                    """
                 
-                ai_response = response.text.strip()
+                    ai_response = ai_gateway.generate(prompt, call_site="projects.detect",
+                                                      cache_input={"text": text, "projects": existing_names},
+                                                      template_version=1,
+                                                      cache_if=lambda r: _parses_as_json(r.replace("'", '"')))
                 
-                try:
-                    import json
-                    # Handle potential formatting issues in the response
-                    ai_response = ai_response.replace("''", '"').replace("'", '"')
-                    # Remove any code block markers that might be in the response
-                    ai_response = ai_response.replace('```json', '').replace('```', '')
-                    # Strip any leading/trailing whitespace
-                    ai_response = ai_response.strip()
+                    try:
+                        import json
+                        # Handle potential formatting issues in the response
+                        ai_response = ai_response.replace("''", '"').replace("'", '"')
+                        # Remove any code block markers that might be in the response
+                        ai_response = ai_response.replace('```json', '').replace('```', '')
+                        # Strip any leading/trailing whitespace
+                        ai_response = ai_response.strip()
                     
-                    ai_detected = json.loads(ai_response)
+                        ai_detected = json.loads(ai_response)
                     
-                    # Add AI-detected projects that aren't already in detected_projects
-                    for ai_project in ai_detected:
-                        # Ensure required fields exist
-                        if not isinstance(ai_project, dict) or 'name' not in ai_project or 'confidence' not in ai_project:
-                            continue
+                        # Add AI-detected projects that aren't already in detected_projects
+                        detected_names = {dp['name'].lower() for dp in detected_projects}
+                        for ai_project in ai_detected:
+                            # Ensure required fields exist
+                            if not isinstance(ai_project, dict) or 'name' not in ai_project or 'confidence' not in ai_project:
+                                continue
                             
-                        if not any(dp['name'].lower() == ai_project['name'].lower() for dp in detected_projects):
-                            # Check if this AI-detected project matches any existing project
-                            matching_project = next((p for p in projects if p['name'].lower() == ai_project['name'].lower()), None)
-                            if matching_project:
-                                detected_projects.append({
-                                    "name": matching_project['name'],
-                                    "id": str(matching_project['_id']),
-                                    "confidence": ai_project['confidence'] * 0.8,  # Slightly reduce confidence for AI
-                                    "type": "ai_matched"
-                                })
-                            else:
-                                detected_projects.append({
-                                    "name": ai_project['name'],
-                                    "id": None,
-                                    "confidence": ai_project['confidence'] * 0.6,  # Lower confidence for new projects
-                                    "type": "ai_suggested"
-                                })
-                except Exception as e:
-                    print(f"[AI] Project detection JSON parsing error: {e}")
-                    # If AI response is not valid JSON, continue with database matches only
+                            if ai_project['name'].lower() not in detected_names:
+                                # Check if this AI-detected project matches any existing project
+                                matching_project = matcher.by_name.get(ai_project['name'].lower())
+                                if matching_project:
+                                    detected_names.add(ai_project['name'].lower())
+                                    detected_projects.append({
+                                        "name": matching_project['name'],
+                                        "id": str(matching_project['_id']),
+                                        "confidence": ai_project['confidence'] * 0.8,  # Slightly reduce confidence for AI
+                                        "type": "ai_matched"
+                                    })
+                                else:
+                                    detected_names.add(ai_project['name'].lower())
+                                    detected_projects.append({
+                                        "name": ai_project['name'],
+                                        "id": None,
+                                        "confidence": ai_project['confidence'] * 0.6,  # Lower confidence for new projects
+                                        "type": "ai_suggested"
+                                    })
+                    except Exception as e:
+                        print(f"[AI] Project detection JSON parsing error: {e}")
+                        ai_gateway.record_parse_failure("projects.detect")
+                        # If AI response is not valid JSON, continue with database matches only
                     
-            except Exception as e:
-                print(f"AI project detection error: {e}")
-                # Continue with database matches only
+                except Exception as e:
+                    print(f"AI project detection error: {e}")
+                    ai_gateway.record_fallback("projects.detect", "database_matches_only")
+                    # Continue with database matches only
             
             # Sort by confidence and remove duplicates
             detected_projects.sort(key=lambda x: x['confidence'], reverse=True)
@@ -268,8 +268,9 @@ class ProjectController:
             update_data['updated_at'] = datetime.datetime.now()
 
             self.projects_collection.update_one({"_id": ObjectId(project_id)}, {"$set": update_data})
+            matcher_cache.invalidate(user_email)
             updated_project = self.projects_collection.find_one({"_id": ObjectId(project_id)})
-            return jsonify({"message": "Project updated successfully", "project": self.parse_json(updated_project)}), 200
+            return jsonify({"message": "Project updated successfully", "project": updated_project}), 200
 
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -280,6 +281,7 @@ class ProjectController:
             if not project:
                 return jsonify({"error": "Project not found"}), 404
             self.projects_collection.delete_one({"_id": ObjectId(project_id)})
+            matcher_cache.invalidate(project.get('created_by'))
             return jsonify({"message": "Project deleted successfully"}), 200
         except Exception as e:
             return jsonify({"error": str(e)}), 500
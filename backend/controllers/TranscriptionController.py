@@ -3,73 +3,82 @@ from bson import ObjectId
 import datetime
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+from text_chunking import chunk_text, estimate_tokens
+import ai_gateway
+
 # Load environment variables from .env if present
 load_dotenv()
 
-# Try to use Google Gemini for summarization
-try:
-    import google.generativeai as genai
-    import os
-    
-    # Initialize Gemini client
-    api_key = os.getenv('GOOGLE_API_KEY')
-    if not api_key:
-        raise ValueError("GOOGLE_API_KEY environment variable not set")
-    
-    genai.configure(api_key=api_key)
-    
-    # Create a summarization function using Gemini
-    def summarize_text(text, max_length=130):
-        try:
-            prompt = f"Summarize the following text in about {max_length} words:\n\n{text}"
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            response = model.generate_content(prompt)
-            
-            if response and response.text:
-                # Clean up the response to handle potential formatting issues
-                summary_text = response.text.strip()
-                summary_text = summary_text.replace('```', '').strip()
-                return [{"summary_text": summary_text}]
-            else:
-                return [{"summary_text": "Error generating summary."}]
-        except Exception as e:
-            print(f"Gemini summarization error: {e}")
+# Create a simple summarization function that just returns the first few sentences
+def simple_summarize(text, max_length=130):
+    sentences = text.split('. ')
+    summary = '. '.join(sentences[:3]) + '.'
+    return [{"summary_text": summary}]
+
+
+# Create a summarization function using Gemini
+def summarize_text(text, max_length=130):
+    try:
+        prompt = f"Summarize the following text in about {max_length} words:\n\n{text}"
+        summary_text = ai_gateway.generate(prompt, call_site="transcription.summarize",
+                                           cache_input={"text": text, "max_length": max_length}, template_version=1)
+
+        if summary_text:
+            # Clean up the response to handle potential formatting issues
+            summary_text = summary_text.replace('```', '').strip()
+            return [{"summary_text": summary_text}]
+        else:
+            ai_gateway.record_fallback("transcription.summarize", "empty_response")
             return [{"summary_text": "Error generating summary."}]
-    
-    # Replace the original summarizer with our function
+    except ai_gateway.AIUnavailableError as e:
+        print(f"Gemini summarization unavailable, using simple summary: {e}")
+        ai_gateway.record_fallback("transcription.summarize", "unavailable")
+        return simple_summarize(text, max_length)
+    except Exception as e:
+        print(f"Gemini summarization error: {e}")
+        ai_gateway.record_fallback("transcription.summarize", "error")
+        return [{"summary_text": "Error generating summary."}]
+
+
+if ai_gateway.is_configured():
     summarizer = summarize_text
-    
-except Exception as e:
-    print(f"Warning: Could not set up Gemini summarization: {e}")
+else:
+    print("Warning: GOOGLE_API_KEY environment variable not set")
     print("Continuing with a simple summarization function")
-    
-    # Create a simple summarization function that just returns the first few sentences
-    def simple_summarize(text, max_length=130):
-        sentences = text.split('. ')
-        summary = '. '.join(sentences[:3]) + '.'
-        return [{"summary_text": summary}]
-    
     summarizer = simple_summarize
 
+SUMMARY_CHUNK_TOKENS = int(os.environ.get('SUMMARY_CHUNK_TOKENS', '3000'))
+SUMMARY_MAX_WORKERS = int(os.environ.get('SUMMARY_MAX_WORKERS', '4'))
+
+def _summarize_chunks(chunks, max_length):
+    """Map step: summarize every chunk concurrently, preserving order."""
+    per_chunk_length = max(max_length // len(chunks), 40)
+    with ThreadPoolExecutor(max_workers=min(SUMMARY_MAX_WORKERS, len(chunks))) as executor:
+        results = executor.map(lambda chunk: summarizer(chunk, max_length=per_chunk_length), chunks)
+        return [result[0]['summary_text'] for result in results]
+
 def summarize_transcription(transcription_text, max_length=150, min_length=50):
-    """Summarize the given transcription text using the Hugging Face transformers library"""
+    """Map-reduce summary: sentence-aligned chunks are summarized in parallel, then combined"""
     try:
-        # For long texts, we need to chunk them as the model has input limits
-        if len(transcription_text) > 1000:
-            chunks = [transcription_text[i:i+1000] for i in range(0, len(transcription_text), 1000)]
-            summaries = []
-            
-            for chunk in chunks:
-                summary = summarizer(chunk, max_length=max_length//len(chunks))
-                summaries.append(summary[0]['summary_text'])
-            
-            return " ".join(summaries)
-        else:
+        chunks = chunk_text(transcription_text, SUMMARY_CHUNK_TOKENS)
+        if len(chunks) <= 1:
             summary = summarizer(transcription_text, max_length=max_length)
             return summary[0]['summary_text']
+
+        summaries = _summarize_chunks(chunks, max_length)
+        combined = "\n".join(summaries)
+        # Reduce step; very long transcripts may need another map round first
+        for _ in range(3):
+            if estimate_tokens(combined) <= SUMMARY_CHUNK_TOKENS:
+                break
+            summaries = _summarize_chunks(chunk_text(combined, SUMMARY_CHUNK_TOKENS), max_length)
+            combined = "\n".join(summaries)
+        summary = summarizer(combined, max_length=max_length)
+        return summary[0]['summary_text']
     except Exception as e:
         print(f"Error in summarization: {str(e)}")
         return None
@@ -135,25 +144,6 @@ class TranscriptionController:
         # if self.socketio:
         #     self.socketio.emit(event, data)
     
-    # Helper function to convert ObjectId and datetime to string for JSON serialization
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, ObjectId):
-                    data[key] = str(value)
-                elif isinstance(value, datetime.datetime):
-                    data[key] = value.isoformat()
-                elif isinstance(value, (dict, list)):
-                    data[key] = self.parse_json(value)
-            return data
-        elif isinstance(data, ObjectId):
-            return str(data)
-        elif isinstance(data, datetime.datetime):
-            return data.isoformat()
-        return data
-    
     def save_transcription(self):
         try:
             data = request.get_json()
@@ -224,7 +214,7 @@ class TranscriptionController:
             
             # Emit socket event for live updates
             # self.emit_socket_event('transcription_created', {
-            #     'transcription': self.parse_json(new_record),
+            #     'transcription': new_record,
             #     'user': user_email
             # })
             
@@ -254,9 +244,7 @@ class TranscriptionController:
             records_cursor = self.ai_notes_collection.find(query).sort('created_at', -1)
             records = list(records_cursor)
             
-            # Convert ObjectId to string for JSON serialization
-            parsed_records = self.parse_json(records)
-            return jsonify({"transcriptions": parsed_records}), 200
+            return jsonify({"transcriptions": records}), 200
         
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -315,7 +303,7 @@ class TranscriptionController:
             
             # Emit socket event for live updates
             # self.emit_socket_event('transcription_restored', {
-            #     'transcription': self.parse_json(restored_transcription),
+            #     'transcription': restored_transcription,
             #     'transcription_id': transcription_id
             # })
             
@@ -403,16 +391,15 @@ class TranscriptionController:
             
             # Emit socket event for transcription update
             # self.emit_socket_event('transcription_notes_added', {
-            #     'transcription': self.parse_json(updated_transcription),
+            #     'transcription': updated_transcription,
             #     'transcription_id': transcription_id,
             #     'notes_count': len(notes_data)
             # })
                 
             # Return transcription record and all processed notes data
-            parsed_record = self.parse_json(record)
             return jsonify({
                 "message": "Transcription ready for notes",
-                "transcription": parsed_record,
+                "transcription": record,
                 "notes_data": notes_data
             }), 200
         
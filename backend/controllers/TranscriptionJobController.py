@@ -0,0 +1,832 @@
+from flask import request, jsonify
+from bson import ObjectId
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import ASCENDING, UpdateOne
+from werkzeug.utils import secure_filename
+import datetime
+import hashlib
+import os
+import socket
+import threading
+import time
+import uuid
+
+from audio_processing import SAMPLE_RATE, iter_pcm_windows, load_pcm, probe_duration, strip_silence
+from whisper_models import registry as whisper_registry, ModelBusyError, select_model, transcribe_options
+
+TRANSCRIPTION_WORKERS = int(os.environ.get('TRANSCRIPTION_WORKERS', '2'))
+TRANSCRIPTION_QUEUE_LIMIT = int(os.environ.get('TRANSCRIPTION_QUEUE_LIMIT', '50'))
+STREAM_WINDOW_SECONDS = float(os.environ.get('TRANSCRIPTION_STREAM_WINDOW', '30'))
+STREAM_OVERLAP_SECONDS = float(os.environ.get('TRANSCRIPTION_STREAM_OVERLAP', '2'))
+TRANSCRIPTION_VAD = os.environ.get('TRANSCRIPTION_VAD', 'true').lower() in ('1', 'true', 'yes')
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = float(os.environ.get('TRANSCRIPT_CACHE_MAX_AGE_DAYS', '30'))
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.environ.get('TRANSCRIPT_CACHE_MAX_ENTRIES', '5000'))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Server-side directories for batch backfills must live under this root; unset disables them
+TRANSCRIPTION_BATCH_ROOT = os.environ.get('TRANSCRIPTION_BATCH_ROOT', '')
+TRANSCRIPTION_BATCH_MAX_FILES = int(os.environ.get('TRANSCRIPTION_BATCH_MAX_FILES', '500'))
+BATCH_DECODE_WORKERS = int(os.environ.get('TRANSCRIPTION_BATCH_DECODE_WORKERS', '4'))
+# Decoded float32 audio held ahead of the model; an hour of 16 kHz audio is ~230 MB
+BATCH_PREFETCH_BYTES = int(float(os.environ.get('TRANSCRIPTION_BATCH_PREFETCH_MB', '512')) * 1024 * 1024)
+# Each process renews a lease on the jobs it runs; jobs whose lease lapsed belong to a dead process
+TRANSCRIPTION_JOB_LEASE_SECONDS = float(os.environ.get('TRANSCRIPTION_JOB_LEASE_SECONDS', '60'))
+AUDIO_EXTENSIONS = {'.webm', '.wav', '.mp3', '.m4a', '.ogg', '.flac', '.mp4', '.aac'}
+
+
+# Runs Whisper transcriptions on a bounded worker pool and tracks them as jobs
+class TranscriptionJobController:
+    def __init__(self, db, socketio=None, temp_dir=None,
+                 max_workers=TRANSCRIPTION_WORKERS, queue_limit=TRANSCRIPTION_QUEUE_LIMIT, runs_jobs=True):
+        self.db = db
+        self.jobs_collection = db.transcription_jobs
+        self.transcripts_collection = db.transcripts
+        self.cache_collection = db.transcript_cache
+        self.socketio = socketio
+        self.temp_dir = temp_dir
+        self.queue_limit = queue_limit
+        # API-only workers (WORKER_ROLE=api) serve job status but never transcribe or load Whisper
+        self.runs_jobs = runs_jobs
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcription') \
+            if runs_jobs else None
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._inflight = {}  # audio hash -> (job_id, future) of jobs still running
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._configure_cache()
+        self._recover_interrupted_jobs()
+        threading.Thread(target=self._heartbeat, name='transcription-lease', daemon=True).start()
+
+    def emit_socket_event(self, event, data):
+        if self.socketio:
+            self.socketio.emit(event, data)
+
+    def _configure_cache(self):
+        """One cache entry per recording, and entries unused for ``TRANSCRIPT_CACHE_MAX_AGE_DAYS`` expire."""
+        try:
+            self._create_unique_hash_index()
+        except Exception as e:
+            # Entries duplicated by racing uploads before the index existed; keep the most recently used
+            print(f"⚠️ Removing duplicate transcript cache entries: {e}")
+            try:
+                duplicates = self.cache_collection.aggregate([
+                    {"$sort": {"last_hit_at": -1}},
+                    {"$group": {"_id": "$audio_hash", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+                    {"$match": {"count": {"$gt": 1}}}
+                ])
+                stale_ids = [entry_id for group in duplicates for entry_id in group["ids"][1:]]
+                self.cache_collection.delete_many({"_id": {"$in": stale_ids}})
+                self._create_unique_hash_index()
+            except Exception as e:
+                print(f"⚠️ Could not create transcript cache hash index: {e}")
+        ttl = int(TRANSCRIPT_CACHE_MAX_AGE_DAYS * 86400)
+        try:
+            self.cache_collection.create_index([("last_hit_at", ASCENDING)], name="transcript_cache_last_hit",
+                                               expireAfterSeconds=ttl)
+        except Exception:
+            try:
+                # The index exists with another TTL (TRANSCRIPT_CACHE_MAX_AGE_DAYS changed)
+                self.db.command("collMod", self.cache_collection.name,
+                                index={"name": "transcript_cache_last_hit", "expireAfterSeconds": ttl})
+            except Exception as e:
+                print(f"⚠️ Could not set transcript cache TTL: {e}")
+
+    def _create_unique_hash_index(self):
+        self.cache_collection.create_index([("audio_hash", ASCENDING)], name="transcript_cache_audio_hash",
+                                           unique=True)
+
+    def _lease_expiry(self):
+        return datetime.datetime.utcnow() + datetime.timedelta(seconds=TRANSCRIPTION_JOB_LEASE_SECONDS)
+
+    def _recover_interrupted_jobs(self):
+        # Only jobs whose owner stopped renewing the lease are dead; other workers' jobs are still live
+        now = datetime.datetime.utcnow()
+        try:
+            result = self.jobs_collection.update_many(
+                {
+                    "status": {"$in": ["queued", "running"]},
+                    "$or": [{"lease_expires_at": {"$lt": now}}, {"lease_expires_at": {"$exists": False}}]
+                },
+                {"$set": {
+                    "status": "failed",
+                    "error": "Interrupted by server restart",
+                    "finished_at": now
+                }}
+            )
+            if result.modified_count:
+                print(f"⚠️ Marked {result.modified_count} interrupted transcription jobs as failed")
+        except Exception as e:
+            print(f"⚠️ Could not recover interrupted transcription jobs: {e}")
+
+    def _heartbeat(self):
+        # Renew our leases, and pick up jobs orphaned by processes that died since startup
+        interval = max(1.0, TRANSCRIPTION_JOB_LEASE_SECONDS / 3)
+        while True:
+            time.sleep(interval)
+            try:
+                self.jobs_collection.update_many(
+                    {"owner": self.owner, "status": {"$in": ["queued", "running"]}},
+                    {"$set": {"lease_expires_at": self._lease_expiry()}}
+                )
+            except Exception as e:
+                print(f"⚠️ Could not renew transcription job leases: {e}")
+            self._recover_interrupted_jobs()
+
+    def queue_depth(self):
+        """Number of jobs submitted to the pool that have not finished yet."""
+        with self._pending_lock:
+            return self._pending
+
+    def _update_job(self, job_id, **fields):
+        fields["updated_at"] = datetime.datetime.utcnow()
+        self.jobs_collection.update_one({"_id": job_id}, {"$set": fields})
+
+    def submit(self, filepath, file_id, event_id, options=None):
+        """Queue a saved audio file for transcription. Returns (job_id, future)."""
+        with self._pending_lock:
+            if self._pending >= self.queue_limit:
+                return None, None
+            self._pending += 1
+
+        job_id = ObjectId()
+        now = datetime.datetime.utcnow()
+        job_doc = {
+            "_id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0,
+            "file_id": file_id,
+            "event_id": event_id,
+            "options": options or {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "owner": self.owner,
+            "lease_expires_at": self._lease_expiry()
+        }
+        audio_hash = (options or {}).get("audio_hash")
+        try:
+            self.jobs_collection.insert_one(job_doc)
+            # Hold the lock so the job can't finish and clear _inflight before it is registered
+            with self._pending_lock:
+                future = self.executor.submit(self._run_job, job_id, filepath, file_id, event_id, options or {})
+                if audio_hash:
+                    self._inflight[audio_hash] = (str(job_id), future)
+        except Exception:
+            with self._pending_lock:
+                self._pending -= 1
+            raise
+        return str(job_id), future
+
+    def _run_job(self, job_id, filepath, file_id, event_id, options):
+        try:
+            self._update_job(job_id, status="running", stage="transcribing", progress=0.1,
+                             started_at=datetime.datetime.utcnow())
+            if options.get("stream"):
+                transcript_doc = self.transcribe_streaming(job_id, filepath, file_id, event_id, options)
+                transcript_text = transcript_doc["transcript"]
+                print('✅ Transcription complete!')
+            else:
+                transcription = self.transcribe_file(filepath, options)
+                transcript_text = transcription["text"]
+                print('✅ Transcription complete!')
+                self._update_job(job_id, stage="saving", progress=0.8)
+                transcript_doc = self._save_transcript(file_id, event_id, transcription, options)
+            if options.get("audio_hash"):
+                self._cache_transcript(options["audio_hash"], transcript_doc, options)
+
+            result = {
+                "transcript": transcript_text,
+                "transcript_id": str(transcript_doc["_id"]),
+                "file_id": file_id,
+                "event_id": event_id
+            }
+            self._update_job(job_id, status="completed", stage="done", progress=1.0,
+                             result=result, finished_at=datetime.datetime.utcnow())
+            self.emit_socket_event('transcription_complete', {"job_id": str(job_id), "status": "completed", **result})
+            return result
+        except Exception as e:
+            print(f'❌ Transcription job {job_id} failed: {str(e)}')
+            self._update_job(job_id, status="failed", stage="failed", error=str(e),
+                             finished_at=datetime.datetime.utcnow())
+            self.emit_socket_event('transcription_complete', {
+                "job_id": str(job_id),
+                "status": "failed",
+                "error": str(e),
+                "file_id": file_id,
+                "event_id": event_id
+            })
+            raise
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+                self._inflight.pop(options.get("audio_hash"), None)
+            try:
+                os.remove(filepath)
+                print(f'🗑️ Deleted temp file {filepath}')
+            except Exception as e:
+                print(f'⚠️ Warning: could not delete temp file {filepath}: {e}')
+
+    def _prepare_samples(self, samples, options):
+        """Apply VAD to decoded PCM when enabled. Returns ``(samples, timestamp_map, vad_stats)``."""
+        if options.get("vad", TRANSCRIPTION_VAD):
+            return strip_silence(samples)
+        return samples, None, None
+
+    def _decode_segments(self, model, samples, timestamp_map, **kwargs):
+        if len(samples) == 0:
+            return []
+        result = model.transcribe(samples, **kwargs, **transcribe_options())
+        segments = []
+        for segment in result.get("segments", []):
+            start, end = segment["start"], segment["end"]
+            if timestamp_map is not None:
+                start, end = timestamp_map.to_original(start), timestamp_map.to_original(end, end=True)
+            segments.append({"start": round(start, 2), "end": round(end, 2), "text": segment["text"].strip()})
+        return segments
+
+    def _transcribe_samples(self, samples, options, **kwargs):
+        """Run Whisper on decoded PCM, skipping silence when VAD is on.
+
+        Returns ``(segments, vad_stats)``; segment times refer to the audio passed in.
+        """
+        samples, timestamp_map, vad_stats = self._prepare_samples(samples, options)
+        if len(samples) == 0:
+            return [], vad_stats
+        with whisper_registry.model(options.get("model")) as model:
+            return self._decode_segments(model, samples, timestamp_map, **kwargs), vad_stats
+
+    def transcribe_file(self, filepath, options=None):
+        options = options or {}
+        print('🎙️ Transcribing audio...')
+        segments, vad_stats = self._transcribe_samples(load_pcm(filepath), options)
+        if vad_stats:
+            print(f'🔇 VAD kept {vad_stats["speech_seconds"]}s of {vad_stats["original_seconds"]}s')
+        return self._transcription(segments, vad_stats)
+
+    def _transcription(self, segments, vad_stats):
+        return {
+            "text": " ".join(seg["text"] for seg in segments if seg["text"]),
+            "segments": segments,
+            "vad": vad_stats
+        }
+
+    def transcribe_streaming(self, job_id, filepath, file_id, event_id, options=None):
+        """Transcribe overlapping windows in order, saving and emitting each window's segments."""
+        options = options or {}
+        now = datetime.datetime.utcnow()
+        transcript_doc = {
+            "file_id": file_id,
+            "event_id": event_id,
+            "transcript": "",
+            "audio_hash": options.get("audio_hash"),
+            "model": options.get("model"),
+            "segments": [],
+            "status": "in_progress",
+            "created_at": now,
+            "updated_at": now
+        }
+        transcript_doc["_id"] = self.transcripts_collection.insert_one(transcript_doc).inserted_id
+        transcript_id = str(transcript_doc["_id"])
+        duration = probe_duration(filepath)
+
+        transcript_text = ""
+        last_end = 0.0
+        for window_start, samples in iter_pcm_windows(filepath, STREAM_WINDOW_SECONDS, STREAM_OVERLAP_SECONDS):
+            # Condition each window on the tail of what was already decoded to keep wording consistent
+            prompt = transcript_text[-200:] or None
+            segments, _ = self._transcribe_samples(samples, options, initial_prompt=prompt)
+
+            new_segments = []
+            for segment in segments:
+                start = round(window_start + segment["start"], 2)
+                end = round(window_start + segment["end"], 2)
+                # Segments centred in the overlap were already emitted by the previous window
+                if (start + end) / 2 < last_end:
+                    continue
+                new_segments.append({"start": start, "end": end, "text": segment["text"]})
+            if not new_segments:
+                continue
+            last_end = new_segments[-1]["end"]
+            transcript_text = " ".join(filter(None, [transcript_text] + [seg["text"] for seg in new_segments]))
+
+            self.transcripts_collection.update_one(
+                {"_id": transcript_doc["_id"]},
+                {
+                    "$push": {"segments": {"$each": new_segments}},
+                    "$set": {"transcript": transcript_text, "updated_at": datetime.datetime.utcnow()}
+                }
+            )
+            window_end = window_start + len(samples) / SAMPLE_RATE
+            progress = round(min(0.95, window_end / duration), 3) if duration else None
+            if progress is not None:
+                self._update_job(job_id, progress=progress)
+            self.emit_socket_event('transcription_segment', {
+                "job_id": str(job_id),
+                "transcript_id": transcript_id,
+                "file_id": file_id,
+                "event_id": event_id,
+                "segments": new_segments,
+                "progress": progress
+            })
+            print(f'📝 Transcribed {window_start:.0f}s-{window_end:.0f}s ({len(new_segments)} segments)')
+
+        self.transcripts_collection.update_one(
+            {"_id": transcript_doc["_id"]},
+            {"$set": {"status": "completed", "updated_at": datetime.datetime.utcnow()}}
+        )
+        transcript_doc["transcript"] = transcript_text
+        print(f'📦 Transcript saved to MongoDB for event_id: {event_id}')
+        return transcript_doc
+
+    def _transcript_doc(self, file_id, event_id, transcription, options):
+        return {
+            "file_id": file_id,
+            "event_id": event_id,
+            "transcript": transcription["text"],
+            "audio_hash": options.get("audio_hash"),
+            "audio_bytes": options.get("audio_bytes"),
+            "segments": transcription["segments"],
+            "vad": transcription["vad"],
+            "model": options.get("model"),
+            "created_at": datetime.datetime.utcnow()
+        }
+
+    def _save_transcript(self, file_id, event_id, transcription, options):
+        transcript_doc = self._transcript_doc(file_id, event_id, transcription, options)
+        result = self.transcripts_collection.insert_one(transcript_doc)
+        transcript_doc["_id"] = result.inserted_id
+        print(f'📦 Transcript saved to MongoDB for event_id: {event_id}')
+        return transcript_doc
+
+    def _cache_transcript(self, audio_hash, transcript_doc, options):
+        self._cache_transcripts([transcript_doc])
+
+    def _cache_transcripts(self, transcript_docs):
+        now = datetime.datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"audio_hash": doc["audio_hash"]},
+                {
+                    "$set": {
+                        "transcript_id": doc["_id"],
+                        "file_id": doc["file_id"],
+                        "model": doc.get("model"),
+                        "audio_bytes": doc.get("audio_bytes"),
+                        "last_hit_at": now
+                    },
+                    "$setOnInsert": {"created_at": now, "hits": 0}
+                },
+                upsert=True
+            )
+            for doc in transcript_docs if doc.get("audio_hash")
+        ]
+        if not operations:
+            return
+        try:
+            self.cache_collection.bulk_write(operations, ordered=False)
+            self.evict_cache(max_entries=TRANSCRIPT_CACHE_MAX_ENTRIES)
+        except Exception as e:
+            print(f"⚠️ Could not cache {len(operations)} transcripts: {e}")
+
+    def lookup_cached_transcript(self, audio_hash, model=None):
+        """Return ``(transcript_doc, notes)`` for audio transcribed before, or ``(None, None)``."""
+        entry = self.cache_collection.find_one({"audio_hash": audio_hash})
+        if not entry or (model and entry.get("model") != model):
+            return None, None
+        transcript_doc = self.transcripts_collection.find_one({"_id": entry["transcript_id"]})
+        if not transcript_doc or transcript_doc.get("status", "completed") != "completed":
+            self.cache_collection.delete_one({"_id": entry["_id"]})
+            return None, None
+        self.cache_collection.update_one(
+            {"_id": entry["_id"]},
+            {"$set": {"last_hit_at": datetime.datetime.utcnow()}, "$inc": {"hits": 1}}
+        )
+        notes = list(self.db.notes.find({"source_transcript_id": transcript_doc["file_id"]}))
+        return transcript_doc, notes
+
+    def evict_cache(self, max_age_days=None, max_entries=None):
+        """Drop cache entries unused for ``max_age_days`` and the least recently used beyond ``max_entries``.
+
+        ``max_entries`` counts entries (one small pointer document per recording),
+        not bytes; ``audio_bytes`` on an entry is informational. Only the cache
+        index is trimmed; the transcripts themselves are kept. The TTL index on
+        ``last_hit_at`` already expires old entries, so ``max_age_days`` only
+        matters for trimming harder than the configured age.
+        """
+        removed = 0
+        if max_age_days is not None:
+            cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=max_age_days)
+            removed += self.cache_collection.delete_many({"last_hit_at": {"$lt": cutoff}}).deleted_count
+        if max_entries is not None:
+            excess = self.cache_collection.count_documents({}) - max_entries
+            if excess > 0:
+                stale_ids = [doc["_id"] for doc in
+                             self.cache_collection.find({}, {"_id": 1}).sort("last_hit_at", 1).limit(excess)]
+                removed += self.cache_collection.delete_many({"_id": {"$in": stale_ids}}).deleted_count
+        return removed
+
+    def evict_cache_endpoint(self):
+        try:
+            data = request.get_json(silent=True) or {}
+            removed = self.evict_cache(
+                max_age_days=float(data.get('max_age_days', TRANSCRIPT_CACHE_MAX_AGE_DAYS)),
+                max_entries=int(data.get('max_entries', TRANSCRIPT_CACHE_MAX_ENTRIES))
+            )
+            return jsonify({"message": "Transcript cache evicted", "removed": removed}), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    def _hash_stream(self, stream, out=None):
+        digest = hashlib.sha256()
+        size = 0
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            if out is not None:
+                out.write(chunk)
+        return digest.hexdigest(), size
+
+    def _save_upload(self, file, filepath):
+        """Write an uploaded file to disk, hashing it on the way. Returns ``(sha256 hex, size)``."""
+        with open(filepath, 'wb') as out:
+            return self._hash_stream(file.stream, out)
+
+    def _collect_batch_items(self):
+        """Save the uploaded ``audio`` files and list ``directory``. Returns ``(items, error_response)``."""
+        items = []
+        for file in request.files.getlist('audio'):
+            if not file or file.filename == '':
+                continue
+            original_name = secure_filename(file.filename) or 'audio.webm'
+            file_id = str(uuid.uuid4())
+            filepath = os.path.join(self.temp_dir, file_id + (os.path.splitext(original_name)[1] or '.webm'))
+            audio_hash, audio_bytes = self._save_upload(file, filepath)
+            items.append({"filename": original_name, "filepath": filepath, "file_id": file_id,
+                          "audio_hash": audio_hash, "audio_bytes": audio_bytes, "temporary": True})
+
+        directory = request.form.get('directory') or (request.get_json(silent=True) or {}).get('directory')
+        if directory:
+            if not TRANSCRIPTION_BATCH_ROOT:
+                return items, (jsonify({'error': 'Server-side batch directories are disabled'}), 403)
+            root = os.path.realpath(TRANSCRIPTION_BATCH_ROOT)
+            path = os.path.realpath(os.path.join(root, directory))
+            if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+                return items, (jsonify({'error': 'Directory not found'}), 404)
+            for name in sorted(os.listdir(path)):
+                filepath = os.path.join(path, name)
+                if os.path.splitext(name)[1].lower() not in AUDIO_EXTENSIONS or not os.path.isfile(filepath):
+                    continue
+                with open(filepath, 'rb') as f:
+                    audio_hash, audio_bytes = self._hash_stream(f)
+                items.append({"filename": name, "filepath": filepath, "file_id": str(uuid.uuid4()),
+                              "audio_hash": audio_hash, "audio_bytes": audio_bytes, "temporary": False})
+        return items, None
+
+    def _remove_temporary(self, items):
+        for item in items:
+            if item["temporary"]:
+                try:
+                    os.remove(item["filepath"])
+                except OSError as e:
+                    print(f'⚠️ Warning: could not delete temp file {item["filepath"]}: {e}')
+
+    def _decoded_bytes(self, item):
+        """Estimated size of a file decoded to float32; unknown durations count as the whole budget."""
+        duration = probe_duration(item["filepath"])
+        if duration is None:
+            return BATCH_PREFETCH_BYTES
+        return int(duration * SAMPLE_RATE) * 4
+
+    def _prefetch_decoded(self, decoder, items, options):
+        """Decode (and VAD) files on the decoder pool ahead of the consumer.
+
+        At most ``BATCH_DECODE_WORKERS * 2`` files and ``BATCH_PREFETCH_BYTES`` of
+        estimated decoded audio are held ahead; one file is always decoded
+        ahead even when it alone exceeds the budget.
+        """
+        def decode(item):
+            return self._prepare_samples(load_pcm(item["filepath"]), options)
+
+        window = max(1, BATCH_DECODE_WORKERS) * 2
+        pending = deque((item, None) for item in items)
+        queued = deque()
+        queued_bytes = 0
+
+        def top_up():
+            nonlocal queued_bytes
+            while pending and len(queued) < window:
+                item, size = pending[0]
+                if size is None:
+                    size = self._decoded_bytes(item)
+                    pending[0] = (item, size)
+                if queued and queued_bytes + size > BATCH_PREFETCH_BYTES:
+                    break
+                pending.popleft()
+                queued.append((item, size, decoder.submit(decode, item)))
+                queued_bytes += size
+
+        top_up()
+        while queued:
+            item, size, future = queued.popleft()
+            try:
+                prepared = future.result()
+            except Exception as e:
+                prepared = e
+            queued_bytes -= size
+            top_up()
+            yield item, prepared
+            # Drop our reference before the next file is fetched
+            prepared = None
+
+    def _run_batch(self, job_id, items, manifest, options):
+        try:
+            self._update_job(job_id, status="running", stage="transcribing", progress=0.0,
+                             started_at=datetime.datetime.utcnow())
+            entries = {entry["file_id"]: entry for entry in manifest}
+            saved = 0
+            # Decoding runs ahead on the decoder pool; the model slot is taken per file so
+            # single uploads can interleave with a long batch
+            with ThreadPoolExecutor(max_workers=BATCH_DECODE_WORKERS, thread_name_prefix='batch-decode') as decoder:
+                for done, (item, prepared) in enumerate(self._prefetch_decoded(decoder, items, options), start=1):
+                    entry = entries[item["file_id"]]
+                    try:
+                        if isinstance(prepared, Exception):
+                            raise prepared
+                        samples, timestamp_map, vad_stats = prepared
+                        with whisper_registry.model(options.get("model")) as model:
+                            segments = self._decode_segments(model, samples, timestamp_map)
+                        item_options = dict(options, audio_hash=item["audio_hash"], audio_bytes=item["audio_bytes"])
+                        # Saved as each file finishes, so a crash mid-batch keeps the finished transcripts
+                        transcript_doc = self._save_transcript(
+                            item["file_id"], options.get("event_id") or item["file_id"],
+                            self._transcription(segments, vad_stats), item_options
+                        )
+                        self._cache_transcript(item["audio_hash"], transcript_doc, item_options)
+                        entry["status"] = "completed"
+                        entry["transcript_id"] = str(transcript_doc["_id"])
+                        saved += 1
+                    except Exception as e:
+                        print(f'❌ Batch item {item["filename"]} failed: {e}')
+                        entry["status"] = "failed"
+                        entry["error"] = str(e)
+                    self._update_job(job_id, progress=round(done / len(items), 3), result={"manifest": manifest})
+            print(f'📦 Batch saved {saved} transcripts to MongoDB')
+
+            failed = sum(1 for entry in manifest if entry["status"] == "failed")
+            result = {"manifest": manifest, "completed": len(manifest) - failed, "failed": failed}
+            self._update_job(job_id, status="completed", stage="done", progress=1.0,
+                             result=result, finished_at=datetime.datetime.utcnow())
+            self.emit_socket_event('transcription_complete', {"job_id": str(job_id), "status": "completed",
+                                                              "batch": True, **result})
+            return result
+        except Exception as e:
+            print(f'❌ Batch transcription job {job_id} failed: {str(e)}')
+            self._update_job(job_id, status="failed", stage="failed", error=str(e),
+                             finished_at=datetime.datetime.utcnow())
+            self.emit_socket_event('transcription_complete', {"job_id": str(job_id), "status": "failed",
+                                                              "batch": True, "error": str(e)})
+            raise
+        finally:
+            with self._pending_lock:
+                self._pending -= 1
+            self._remove_temporary(items)
+
+    def transcribe_batch(self):
+        if not self.runs_jobs:
+            return self._not_a_transcription_worker()
+        items, error = self._collect_batch_items()
+        if error:
+            self._remove_temporary(items)
+            return error
+        if not items:
+            return jsonify({'error': 'No audio files provided'}), 400
+        if len(items) > TRANSCRIPTION_BATCH_MAX_FILES:
+            self._remove_temporary(items)
+            return jsonify({'error': f'At most {TRANSCRIPTION_BATCH_MAX_FILES} files per batch'}), 400
+
+        requested_model = request.form.get('model') or request.args.get('model')
+        try:
+            model_name, model_reason = select_model(
+                quality=request.form.get('quality') or request.args.get('quality'),
+                queue_depth=self.queue_depth(),
+                requested=requested_model
+            )
+        except ValueError as e:
+            self._remove_temporary(items)
+            return jsonify({'error': str(e)}), 400
+
+        manifest = []
+        to_transcribe = []
+        for item in items:
+            entry = {"filename": item["filename"], "file_id": item["file_id"], "status": "queued"}
+            transcript_doc, _ = self.lookup_cached_transcript(item["audio_hash"], requested_model)
+            if transcript_doc:
+                entry.update(status="cached", file_id=transcript_doc["file_id"],
+                             transcript_id=str(transcript_doc["_id"]))
+                if item["temporary"]:
+                    self._remove_temporary([item])
+            else:
+                to_transcribe.append(item)
+            manifest.append(entry)
+        if not to_transcribe:
+            return jsonify({'message': 'Batch transcription complete', 'manifest': manifest}), 200
+
+        options = {
+            "model": model_name,
+            "model_reason": model_reason,
+            "vad": TRANSCRIPTION_VAD and (request.form.get('vad') or request.args.get('vad') or 'true').lower() not in ('0', 'false', 'no'),
+            "event_id": request.form.get('event_id')
+        }
+        with self._pending_lock:
+            if self._pending >= self.queue_limit:
+                self._remove_temporary(to_transcribe)
+                return jsonify({'error': 'Transcription queue is full, try again later'}), 503
+            self._pending += 1
+
+        job_id = ObjectId()
+        now = datetime.datetime.utcnow()
+        try:
+            self.jobs_collection.insert_one({
+                "_id": job_id,
+                "type": "batch",
+                "status": "queued",
+                "stage": "queued",
+                "progress": 0.0,
+                "files": len(to_transcribe),
+                "options": options,
+                "result": {"manifest": manifest},
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+                "started_at": None,
+                "finished_at": None,
+                "owner": self.owner,
+                "lease_expires_at": self._lease_expiry()
+            })
+            future = self.executor.submit(self._run_batch, job_id, to_transcribe, manifest, options)
+        except Exception as e:
+            with self._pending_lock:
+                self._pending -= 1
+            self._remove_temporary(to_transcribe)
+            return jsonify({'error': f'Could not queue batch: {str(e)}'}), 500
+
+        # Batches can run for hours, so by default the request only queues them
+        if self._flag('async', default=True):
+            return jsonify({
+                'message': 'Batch transcription queued',
+                'job_id': str(job_id),
+                'status': 'queued',
+                'model': model_name,
+                'files': len(manifest),
+                'status_url': f'/api/transcribe/jobs/{job_id}'
+            }), 202
+        try:
+            result = future.result()
+        except ModelBusyError as e:
+            return jsonify({'error': str(e), 'job_id': str(job_id)}), 503
+        except Exception as e:
+            return jsonify({'error': f'Batch transcription failed: {str(e)}', 'job_id': str(job_id)}), 500
+        return jsonify({'message': 'Batch transcription complete', 'job_id': str(job_id), 'model': model_name, **result}), 200
+
+    def _not_a_transcription_worker(self):
+        return jsonify({
+            'error': 'This worker does not run transcriptions (WORKER_ROLE=api); '
+                     'send uploads to a transcription worker'
+        }), 503
+
+    def _flag(self, name, default=False):
+        value = request.form.get(name) or request.args.get(name)
+        if not value:
+            return default
+        return value.lower() in ('1', 'true', 'yes')
+
+    def upload_audio(self):
+        if not self.runs_jobs:
+            return self._not_a_transcription_worker()
+        if 'audio' not in request.files:
+            print('❌ No audio file part in request')
+            return jsonify({'error': 'No audio file part'}), 400
+        file = request.files['audio']
+        if file.filename == '':
+            print('❌ No selected file')
+            return jsonify({'error': 'No selected file'}), 400
+
+        filename = secure_filename(f"{uuid.uuid4()}.webm")
+        filepath = os.path.join(self.temp_dir, filename)
+        audio_hash, audio_bytes = self._save_upload(file, filepath)
+        print(f'💾 Saved audio to {filepath}')
+
+        file_id = filename.rsplit('.', 1)[0]
+        event_id = request.form.get('event_id') or file_id
+        # Transcription runs off the request thread; async=0 keeps the old blocking response
+        run_async = self._flag('async', default=True)
+        requested_model = request.form.get('model') or request.args.get('model')
+
+        transcript_doc, notes = self.lookup_cached_transcript(audio_hash, requested_model)
+        if transcript_doc:
+            os.remove(filepath)
+            print(f'♻️ Returning cached transcript {transcript_doc["_id"]} for audio {audio_hash[:12]}')
+            return jsonify({
+                'message': 'Transcription complete',
+                'cached': True,
+                'status': 'completed',
+                'model': transcript_doc.get('model'),
+                'transcript_id': str(transcript_doc['_id']),
+                'transcript': transcript_doc.get('transcript', ''),
+                'notes': notes
+            }), 200
+
+        with self._pending_lock:
+            inflight = self._inflight.get(audio_hash)
+        if inflight:
+            # The same recording is already being transcribed (retry or double click)
+            os.remove(filepath)
+            job_id, future = inflight
+            print(f'♻️ Audio {audio_hash[:12]} already queued as job {job_id}')
+            return self._job_response(job_id, future, run_async, None)
+
+        duration = probe_duration(filepath)
+        try:
+            model_name, model_reason = select_model(
+                duration=duration,
+                quality=request.form.get('quality') or request.args.get('quality'),
+                queue_depth=self.queue_depth(),
+                requested=requested_model
+            )
+        except ValueError as e:
+            os.remove(filepath)
+            return jsonify({'error': str(e)}), 400
+        print(f'🧠 Using Whisper "{model_name}" ({model_reason})')
+        options = {
+            "stream": self._flag('stream'),
+            "vad": TRANSCRIPTION_VAD and (request.form.get('vad') or request.args.get('vad') or 'true').lower() not in ('0', 'false', 'no'),
+            "model": model_name,
+            "model_reason": model_reason,
+            "duration": duration,
+            "audio_hash": audio_hash,
+            "audio_bytes": audio_bytes
+        }
+
+        try:
+            job_id, future = self.submit(filepath, file_id, event_id, options)
+        except Exception as e:
+            os.remove(filepath)
+            return jsonify({'error': f'Could not queue transcription: {str(e)}'}), 500
+        if job_id is None:
+            os.remove(filepath)
+            return jsonify({'error': 'Transcription queue is full, try again later'}), 503
+        return self._job_response(job_id, future, run_async, model_name)
+
+    def _job_response(self, job_id, future, run_async, model_name):
+        if run_async:
+            return jsonify({
+                'message': 'Transcription queued',
+                'job_id': job_id,
+                'status': 'queued',
+                'model': model_name,
+                'status_url': f'/api/transcribe/jobs/{job_id}'
+            }), 202
+
+        try:
+            result = future.result()
+        except ModelBusyError as e:
+            return jsonify({'error': str(e), 'job_id': job_id}), 503
+        except Exception as e:
+            return jsonify({'error': f'Transcription failed: {str(e)}', 'job_id': job_id}), 500
+        return jsonify({
+            'message': 'Transcription complete',
+            'job_id': job_id,
+            'model': model_name,
+            'transcript': result['transcript']
+        }), 200
+
+    def get_job(self, job_id):
+        try:
+            if not ObjectId.is_valid(job_id):
+                return jsonify({"error": "Invalid job ID"}), 400
+            job = self.jobs_collection.find_one({"_id": ObjectId(job_id)})
+            if not job:
+                return jsonify({"error": "Job not found"}), 404
+            return jsonify({"job": job}), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    def list_jobs(self):
+        try:
+            query = {}
+            if request.args.get('status'):
+                query['status'] = request.args.get('status')
+            if request.args.get('event_id'):
+                query['event_id'] = request.args.get('event_id')
+            limit = min(int(request.args.get('limit', 50)), 200)
+            jobs = list(self.jobs_collection.find(query).sort('created_at', -1).limit(limit))
+            return jsonify({"jobs": jobs, "queue_depth": self.queue_depth()}), 200
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
@@ -1,6 +1,7 @@
 from flask import request, jsonify
 from bson import ObjectId
 import datetime
+import note_search
 
 # Handles versioning (history, rollback) for notes
 class VersionsController:
@@ -13,25 +14,6 @@ class VersionsController:
         pass
         # if self.socketio:
         #     self.socketio.emit(event, data)
-    # Converts MongoDB objects to JSON-serializable format
-    def parse_json(self, data):
-        if isinstance(data, list):
-            return [self.parse_json(item) for item in data]
-        elif isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, ObjectId):
-                    data[key] = str(value)
-                elif isinstance(value, datetime.datetime):
-                    data[key] = value.isoformat()
-                elif isinstance(value, (dict, list)):
-                    data[key] = self.parse_json(value)
-            return data
-        elif isinstance(data, ObjectId):
-            return str(data)
-        elif isinstance(data, datetime.datetime):
-            return data.isoformat()
-        return data
-    
     # Updates a note, saves previous version in history
     def update_note(self, note_id):
         try:
@@ -100,6 +82,8 @@ class VersionsController:
                     current_tags.append(current_type)
                 
                 update_data['tags'] = current_tags
+            if any(field in update_data for field in note_search.SEARCH_FIELDS):
+                update_data['search_keys'] = note_search.search_keys(dict(note, **update_data))
             
             # Push the version to the versions array and update the note
             result = self.notes_collection.update_one(
@@ -111,9 +95,8 @@ class VersionsController:
             )
             
             # Return the updated note
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
-            parsed_note = self.parse_json(updated_note)
-            return jsonify({"message": "Note updated successfully", "note": parsed_note}), 200
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
+            return jsonify({"message": "Note updated successfully", "note": updated_note}), 200
         
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -148,7 +131,7 @@ class VersionsController:
                 version["is_current"] = False
                 result.append(version)
                 
-            return jsonify({"versions": self.parse_json(result)}), 200
+            return jsonify({"versions": result}), 200
         
         except Exception as e:
             return jsonify({"error": str(e)}), 500
@@ -216,10 +199,14 @@ class VersionsController:
             
             # Only update deadline and type if they exist in the version
             if 'deadline' in target_version:
-                update_data['deadline'] = target_version['deadline']
+                # Imported here: controllers.Notes imports this module
+                from controllers.Notes import parse_deadline
+                update_data['deadline'] = parse_deadline(target_version['deadline'])
             if 'type' in target_version:
                 update_data['type'] = target_version['type']
                 
+            update_data['search_keys'] = note_search.search_keys(dict(note, **update_data))
+
             # Add a rollback comment and push the version
             rollback_message = {
                 "version_id": str(ObjectId()),
@@ -239,18 +226,17 @@ class VersionsController:
                 }
             )
               # Return the updated note
-            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)})
-            parsed_note = self.parse_json(updated_note)
+            updated_note = self.notes_collection.find_one({"_id": ObjectId(note_id)}, {"search_keys": 0})
             
             # Emit socket event for live updates
             # self.emit_socket_event('note_rollback', {
-            #     'note': parsed_note,
+            #     'note': updated_note,
             #     'note_id': note_id,
             #     'rolled_back_to': version_id,
             #     'rolled_back_by': user_email
             # })
             
-            return jsonify({"message": "Note rolled back successfully", "note": parsed_note}), 200
+            return jsonify({"message": "Note rolled back successfully", "note": updated_note}), 200
             
         except Exception as e:
             return jsonify({"error": str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,263 @@
+"""Index declarations for every collection the controllers query, plus an explain-based advisor.
+
+``INDEXES`` lists the compound indexes each query shape needs; ``bootstrap``
+creates the missing ones on a background thread at startup so the API is
+serving while they build. ``QUERY_SHAPES`` mirrors the filters and sorts the
+controllers issue; ``explain_report`` runs ``explain`` on each and flags the
+ones that still scan the whole collection or sort in memory. Add an index and
+a shape here whenever a controller gains a new query.
+"""
+import datetime
+import os
+import threading
+
+from pymongo import ASCENDING, DESCENDING
+
+from controllers.TranscriptionJobController import TRANSCRIPT_CACHE_MAX_AGE_DAYS
+
+BOOTSTRAP_ENABLED = os.environ.get('DB_INDEX_BOOTSTRAP', 'true').lower() not in ('0', 'false', 'no')
+
+# Paginated listings sort on (field, _id) in one direction (see pagination.paginate); an index serves
+# that sort, walked either way, only if it ends with the same two keys in matching directions
+_LISTING_SORT = [("updated_at", DESCENDING), ("_id", DESCENDING)]
+
+# collection -> [(name, keys, options)]
+INDEXES = {
+    "notes": [
+        ("notes_owner_status_updated_id",
+         [("created_by", ASCENDING), ("in_trash", ASCENDING), ("completed", ASCENDING)] + _LISTING_SORT, {}),
+        ("notes_status_updated_id", [("in_trash", ASCENDING), ("completed", ASCENDING)] + _LISTING_SORT, {}),
+        ("notes_type_status_updated_id",
+         [("type", ASCENDING), ("in_trash", ASCENDING), ("completed", ASCENDING)] + _LISTING_SORT, {}),
+        ("notes_tags_updated_id", [("tags", ASCENDING)] + _LISTING_SORT, {}),
+        ("notes_owner_deadline", [("created_by", ASCENDING), ("deadline", ASCENDING)], {}),
+        ("notes_owner_created", [("created_by", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("notes_project_updated_id", [("project_id", ASCENDING), ("in_trash", ASCENDING)] + _LISTING_SORT, {}),
+        ("notes_source_transcript", [("source_transcript_id", ASCENDING)], {"sparse": True}),
+    ],
+    "messages": [
+        ("messages_chat_timestamp", [("chat_id", ASCENDING), ("timestamp", ASCENDING)], {}),
+    ],
+    "chat_rooms": [
+        ("chat_rooms_participants_activity", [("participants", ASCENDING), ("last_activity", DESCENDING)], {}),
+    ],
+    "users": [
+        ("users_email", [("email", ASCENDING)], {}),
+        ("users_role", [("role", ASCENDING)], {}),
+    ],
+    "people": [
+        ("people_name", [("name", ASCENDING)], {}),
+        ("people_email", [("email", ASCENDING)], {"sparse": True}),
+    ],
+    "projects": [
+        ("projects_owner_created",
+         [("created_by", ASCENDING), ("in_trash", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("projects_name", [("name", ASCENDING)], {}),
+    ],
+    "ai_notes": [
+        ("ai_notes_owner_created",
+         [("created_by", ASCENDING), ("in_trash", ASCENDING), ("created_at", DESCENDING)], {}),
+    ],
+    "comments": [
+        ("comments_note", [("note_id", ASCENDING)], {}),
+    ],
+    "transcription_jobs": [
+        ("transcription_jobs_status_created", [("status", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("transcription_jobs_event_created", [("event_id", ASCENDING), ("created_at", DESCENDING)], {}),
+        ("transcription_jobs_created", [("created_at", DESCENDING)], {}),
+        # Lease renewal by the owning process
+        ("transcription_jobs_owner_status", [("owner", ASCENDING), ("status", ASCENDING)], {}),
+    ],
+    "transcripts": [
+        # Lookups by the ids handed to clients and stamped on derived notes
+        ("transcripts_file_id", [("file_id", ASCENDING)], {}),
+        ("transcripts_event_created", [("event_id", ASCENDING), ("created_at", DESCENDING)], {}),
+    ],
+    "transcript_cache": [
+        # Same names and options as TranscriptionJobController._configure_cache, which builds them first
+        ("transcript_cache_audio_hash", [("audio_hash", ASCENDING)], {"unique": True}),
+        ("transcript_cache_last_hit", [("last_hit_at", ASCENDING)],
+         {"expireAfterSeconds": int(TRANSCRIPT_CACHE_MAX_AGE_DAYS * 86400)}),
+    ],
+}
+
+# Indexes replaced by a declaration above under a new name; dropped once the replacement exists
+SUPERSEDED = {
+    "notes": {
+        "notes_owner_status_updated": "notes_owner_status_updated_id",
+        "notes_status_updated": "notes_status_updated_id",
+        "notes_type_status_updated": "notes_type_status_updated_id",
+        "notes_tags_updated": "notes_tags_updated_id",
+        "notes_project_updated": "notes_project_updated_id",
+    },
+}
+
+_EMAIL = "someone@example.com"
+_NOW = datetime.datetime(2024, 1, 1)
+
+# (name, collection, filter, sort) as issued by the controllers, with sample values
+QUERY_SHAPES = [
+    ("notes.active_for_user", "notes",
+     {"created_by": _EMAIL, "completed": False, "in_trash": False}, _LISTING_SORT),
+    ("notes.active_all", "notes", {"completed": False, "in_trash": False}, _LISTING_SORT),
+    ("notes.completed_all", "notes", {"completed": True, "in_trash": False}, _LISTING_SORT),
+    ("notes.by_type", "notes", {"type": "routine task", "completed": False, "in_trash": False}, _LISTING_SORT),
+    ("notes.by_tag", "notes", {"tags": "urgent", "completed": False, "in_trash": False}, _LISTING_SORT),
+    ("notes.search", "notes",
+     {"search_keys": {"$all": ["bud"]}, "completed": False, "in_trash": False}, _LISTING_SORT),
+    ("notes.deadlines_due", "notes",
+     {"created_by": _EMAIL, "completed": False, "in_trash": False,
+      "deadline": {"$gte": _NOW, "$lte": _NOW + datetime.timedelta(minutes=5)}}, None),
+    ("notes.duplicate_check", "notes",
+     {"title": "Title", "created_by": _EMAIL, "created_at": {"$gte": _NOW}, "in_trash": False}, None),
+    ("notes.project", "notes", {"project_id": "0" * 24, "in_trash": False}, _LISTING_SORT),
+    ("notes.from_transcript", "notes", {"source_transcript_id": "file-id"}, None),
+    ("messages.room", "messages", {"chat_id": "0" * 24}, [("timestamp", ASCENDING)]),
+    ("messages.last_in_room", "messages", {"chat_id": "0" * 24}, [("timestamp", DESCENDING)]),
+    ("messages.unread", "messages",
+     {"chat_id": "0" * 24, "sender": {"$ne": _EMAIL}, "read_by": {"$ne": _EMAIL}}, None),
+    ("chat_rooms.for_user", "chat_rooms", {"participants": _EMAIL}, [("last_activity", DESCENDING)]),
+    ("chat_rooms.direct", "chat_rooms",
+     {"type": "direct", "participants": {"$all": [_EMAIL, "other@example.com"], "$size": 2}}, None),
+    ("users.by_email", "users", {"email": _EMAIL}, None),
+    ("users.by_role", "users", {"role": "admin"}, None),
+    ("people.by_name", "people", {"name": "Someone"}, None),
+    ("people.by_email", "people", {"email": _EMAIL}, None),
+    ("projects.for_user", "projects", {"created_by": _EMAIL, "in_trash": False}, [("created_at", DESCENDING)]),
+    ("projects.by_name", "projects", {"name": "Project", "created_by": _EMAIL, "in_trash": False}, None),
+    ("ai_notes.for_user", "ai_notes", {"created_by": _EMAIL, "in_trash": False}, [("created_at", DESCENDING)]),
+    ("comments.for_note", "comments", {"note_id": "0" * 24}, None),
+    ("transcription_jobs.recent", "transcription_jobs", {}, [("created_at", DESCENDING)]),
+    ("transcription_jobs.by_status", "transcription_jobs", {"status": "running"}, [("created_at", DESCENDING)]),
+    ("transcription_jobs.by_event", "transcription_jobs", {"event_id": "event"}, [("created_at", DESCENDING)]),
+    ("transcription_jobs.lease_renewal", "transcription_jobs",
+     {"owner": "host:1", "status": {"$in": ["queued", "running"]}}, None),
+    ("transcription_jobs.lease_expired", "transcription_jobs",
+     {"status": {"$in": ["queued", "running"]}, "lease_expires_at": {"$lt": _NOW}}, None),
+    ("transcript_cache.by_hash", "transcript_cache", {"audio_hash": "0" * 64}, None),
+    ("transcript_cache.least_recent", "transcript_cache", {}, [("last_hit_at", ASCENDING)]),
+]
+
+_status = {"state": "not_started", "created": [], "existing": [], "dropped": [], "failed": {}}
+_status_lock = threading.Lock()
+
+
+def ensure_indexes(db):
+    """Create every declared index that doesn't exist yet. Returns the names created."""
+    created = []
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        try:
+            existing = {index["name"] for index in collection.list_indexes()}
+        except Exception:
+            existing = set()
+        for name, keys, options in indexes:
+            if name in existing:
+                with _status_lock:
+                    _status["existing"].append(name)
+                continue
+            try:
+                # background is ignored by MongoDB 4.2+, whose builds only lock briefly at start and end
+                collection.create_index(keys, name=name, background=True, **options)
+                created.append(name)
+                with _status_lock:
+                    _status["created"].append(name)
+            except Exception as e:
+                print(f"⚠️ Could not create index {collection_name}.{name}: {e}")
+                with _status_lock:
+                    _status["failed"][name] = str(e)
+        _drop_superseded(collection, existing | set(created))
+    return created
+
+
+def _drop_superseded(collection, present):
+    for old_name, new_name in SUPERSEDED.get(collection.name, {}).items():
+        if old_name in present and new_name in present:
+            try:
+                collection.drop_index(old_name)
+                with _status_lock:
+                    _status["dropped"].append(old_name)
+            except Exception as e:
+                print(f"⚠️ Could not drop superseded index {collection.name}.{old_name}: {e}")
+
+
+def _plan_stages(plan):
+    """Every stage name in an explain plan tree (classic and slot-based engine layouts)."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(_plan_stages(item))
+    return stages
+
+
+def _index_names(plan):
+    if isinstance(plan, dict):
+        if plan.get("indexName"):
+            yield plan["indexName"]
+        for value in plan.values():
+            yield from _index_names(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _index_names(item)
+
+
+def explain_report(db):
+    """Explain each query shape; ``collection_scans`` lists the shapes no index serves."""
+    queries = []
+    for name, collection_name, query, sort in QUERY_SHAPES:
+        entry = {"query": name, "collection": collection_name}
+        try:
+            cursor = db[collection_name].find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            winning_plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+            stages = _plan_stages(winning_plan)
+            entry["collection_scan"] = "COLLSCAN" in stages
+            entry["in_memory_sort"] = "SORT" in stages
+            entry["indexes"] = sorted(set(_index_names(winning_plan)))
+        except Exception as e:
+            entry["error"] = str(e)
+        queries.append(entry)
+    return {
+        "collection_scans": [q["query"] for q in queries if q.get("collection_scan")],
+        "in_memory_sorts": [q["query"] for q in queries if q.get("in_memory_sort")],
+        "queries": queries,
+    }
+
+
+def _bootstrap(db):
+    with _status_lock:
+        _status["state"] = "building"
+    try:
+        created = ensure_indexes(db)
+        if created:
+            print(f"🗂️ Created {len(created)} indexes: {', '.join(created)}")
+        report = explain_report(db)
+        for name in report["collection_scans"]:
+            print(f"⚠️ Query '{name}' still does a collection scan")
+    finally:
+        with _status_lock:
+            _status["state"] = "done"
+
+
+def bootstrap(db):
+    """Build missing indexes and log remaining collection scans without delaying startup."""
+    if not BOOTSTRAP_ENABLED or db is None:
+        return
+    threading.Thread(target=_bootstrap, args=(db,), name="db-index-bootstrap", daemon=True).start()
+
+
+def status():
+    with _status_lock:
+        return {
+            "state": _status["state"],
+            "created": list(_status["created"]),
+            "existing": list(_status["existing"]),
+            "dropped": list(_status["dropped"]),
+            "failed": dict(_status["failed"]),
+        }
@@ -1,5 +1,8 @@
 # Typical Flask setup
-from flask import Flask, current_app, jsonify, request, send_file
+import time
+_startup_started = time.perf_counter()
+
+from flask import Flask, Response, current_app, jsonify, request, send_file
 from flask_cors import CORS
 from pymongo import MongoClient
 import json
@@ -12,13 +15,21 @@ from werkzeug.utils import secure_filename
 from datetime import datetime
 import os
 import shutil
-import whisper
 import subprocess
 import re
 import uuid
 from flask_socketio import SocketIO, emit, join_room, leave_room
 from controllers.MindmapController import MindmapController
 from controllers.HierarchicalMindmapController import HierarchicalMindmapController, hierarchical_mindmap_bp
+from controllers.TranscriptionJobController import TranscriptionJobController
+from whisper_models import registry as whisper_registry, process_rss_bytes
+import ai_gateway
+import ai_cache
+import ai_metrics
+import note_search
+import db_indexes
+import serialization
+import sys
 
 # Load environment variables from .env file
 try:
@@ -29,8 +40,10 @@ except ImportError:
     print("⚠️ python-dotenv not installed, using system environment variables")
 
 app = Flask(__name__)
+# jsonify and Socket.IO events encode ObjectIds and datetimes directly
+serialization.install(app)
 CORS(app, origins=["http://localhost:5173"])
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading", json=serialization)
 
 # MongoDB setup
 try:
@@ -48,15 +61,15 @@ if db is not None:
     try:
         app.register_blueprint(auth_bp, url_prefix='/')
         app.register_blueprint(hierarchical_mindmap_bp, url_prefix='/')
-        mindmap_controller = MindmapController(db, socketio)
-        hierarchical_mindmap_controller = HierarchicalMindmapController(db)
-        # Make db available to the app context for the blueprint routes
-        app.db = db
     except Exception as e:
         print(f"Blueprint registration failed: {e}")
 elif db is None:
     print("DB not available, blueprints not registered.")
 
+# "api" workers refuse uploads and never load Whisper, "transcription" workers load it at startup,
+# "all" loads it on first upload
+WORKER_ROLE = os.environ.get('WORKER_ROLE', 'all')
+
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 TEMP_AUDIO_DIR = os.path.join(APP_ROOT, 'temp_audio')
 os.makedirs(TEMP_AUDIO_DIR, exist_ok=True)
@@ -76,6 +89,16 @@ try:
     chat_controller = ChatController(db)
     transcription_controller = TranscriptionController(db)
     project_controller = ProjectController(db, socketio)
+    # The mindmaps read and create the same people, projects and notes, so they share this database
+    mindmap_controller = MindmapController(db, socketio)
+    hierarchical_mindmap_controller = HierarchicalMindmapController(db)
+    # Make db available to the app context for the blueprint routes
+    app.db = db
+    transcription_job_controller = TranscriptionJobController(db, socketio, TEMP_AUDIO_DIR,
+                                                              runs_jobs=WORKER_ROLE != 'api')
+    ai_cache.configure(db)
+    note_search.configure(db.notes)
+    db_indexes.bootstrap(db)
 except Exception as e:
     print(f"Error connecting to MongoDB: {e}")
 import os
@@ -297,99 +320,23 @@ def download_chat_file(filename):
 # ====================== AUDIO HANDLING ======================
 @app.route('/upload_audio', methods=['POST'])
 def upload_audio():
-    if 'audio' not in request.files:
-        print('❌ No audio file part in request')
-        return jsonify({'error': 'No audio file part'}), 400
-    file = request.files['audio']
-    if file.filename == '':
-        print('❌ No selected file')
-        return jsonify({'error': 'No selected file'}), 400
-
-    filename = secure_filename(f"{uuid.uuid4()}.webm")
-    filepath = os.path.join(TEMP_AUDIO_DIR, filename)
-    file.save(filepath)
-    print(f'💾 Saved audio to {filepath}')
+    return transcription_job_controller.upload_audio()
 
-    try:
-        print('🧠 Loading Whisper model...')
-        model = whisper.load_model("large")
-        print('🎙️ Transcribing audio...')
-        result = model.transcribe(filepath)
-        transcript_text = result["text"]
-        print('✅ Transcription complete!')
-        print(f'📝 Transcript text: {transcript_text}')
-    except Exception as e:
-        print(f'❌ Transcription failed: {str(e)}')
-        try:
-            os.remove(filepath)
-            print(f'🗑️ Deleted temp file {filepath}')
-        except Exception as del_e:
-            print(f'⚠️ Could not delete temp file {filepath}: {del_e}')
-        return jsonify({'error': f'Transcription failed: {str(e)}'}), 500
-
-    event_id = request.form.get('event_id') or filename.split('.')[0]
-    transcript_doc = {
-        "file_id": filename.rsplit('.', 1)[0],
-        "event_id": event_id,
-        "transcript": transcript_text,
-        "created_at": datetime.utcnow()
-    }
-    db = app.config['db']
-    db.transcripts.insert_one(transcript_doc)
-    print(f'📦 Transcript saved to MongoDB for event_id: {event_id}')
+@app.route('/api/transcribe/batch', methods=['POST'])
+def transcribe_batch():
+    return transcription_job_controller.transcribe_batch()
 
-    try:
-        print('🔗 Sending transcript to AI for task extraction...')
-        print("⚠️ AI processing skipped - will be implemented later")
-        ai_data = {"ai_output": "[]", "message": "AI processing not implemented"}
-        print(f'🤖 AI response JSON: {ai_data}')
-        if "ai_output" in ai_data:
-            import json
-            try:
-                tasks = json.loads(ai_data["ai_output"])
-                print(f'📝 Parsed tasks: {tasks}')
-                for task in tasks:
-                    tags = task.get("tags", [])
-                    if isinstance(tags, str):
-                        tags = [tags] if tags else []
-                    
-                    note_type = task.get("type", "daily task")
-                    if note_type and note_type not in tags:
-                        tags.append(note_type)
-                    
-                    note_doc = {
-                        "title": task.get("title"),
-                        "description": task.get("description"),
-                        "tags": tags,
-                        "color": task.get("color", "blue"),
-                        "deadline": task.get("deadline"),
-                        "type": note_type,
-                        "completed": False,
-                        "comments": [],
-                        "versions": [],
-                        "created_at": datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                        "in_trash": False,
-                        "created_by": "meeting_ai",
-                        "created_by_name": "Meeting AI",
-                        "source_transcript_id": transcript_doc["file_id"]
-                    }
-                    db.notes.insert_one(note_doc)
-                print("Tasks were made")
-            except Exception as e:
-                print(f"⚠️ Failed to parse AI output or insert tasks: {e}")
-        else:
-            print("⚠️ No 'ai_output' in AI response")
-    except Exception as e:
-        print(f"Task generation failed: {e}")
+@app.route('/api/transcribe/jobs', methods=['GET'])
+def list_transcription_jobs():
+    return transcription_job_controller.list_jobs()
 
-    try:
-        os.remove(filepath)
-        print(f'🗑️ Deleted temp file {filepath}')
-    except Exception as e:
-        print(f'⚠️ Warning: could not delete temp file {filepath}: {e}')
+@app.route('/api/transcribe/jobs/<job_id>', methods=['GET'])
+def get_transcription_job(job_id):
+    return transcription_job_controller.get_job(job_id)
 
-    return jsonify({'message': 'Transcription complete', 'transcript': transcript_text}), 200
+@app.route('/api/transcribe/cache/evict', methods=['POST'])
+def evict_transcript_cache():
+    return transcription_job_controller.evict_cache_endpoint()
 
 # ====================== OTHER ENDPOINTS ======================
 @app.route('/api/notes/keyword-note', methods=['POST', 'OPTIONS'])
@@ -553,6 +500,10 @@ def add_transcription_to_notes(transcription_id):
 def api_transcribe():
     return upload_audio()
 
+@app.route('/api/transcribe/models', methods=['GET'])
+def transcribe_models_status():
+    return jsonify(whisper_registry.status()), 200
+
 @app.route('/api/migrate/notes-tags', methods=['POST'])
 def migrate_notes_tags():
     try:
@@ -763,7 +714,50 @@ def handle_delete_node(data):
     db.mindmap_nodes.delete_one({'id': data['id']})
     emit('node_deleted', data, broadcast=True)
 
+def build_startup_report():
+    heavy_modules = ['torch', 'whisper', 'google.generativeai', 'numpy']
+    return {
+        "role": WORKER_ROLE,
+        "startup_seconds": round(time.perf_counter() - _startup_started, 3),
+        "process_rss_bytes": process_rss_bytes(),
+        "heavy_modules_loaded": [name for name in heavy_modules if name in sys.modules],
+    }
+
+startup_report = build_startup_report()
+print(f"🚀 Startup took {startup_report['startup_seconds']}s "
+      f"(RSS {(startup_report['process_rss_bytes'] or 0) / 1e6:.0f} MB, "
+      f"heavy modules loaded: {', '.join(startup_report['heavy_modules_loaded']) or 'none'})")
+
+@app.route('/api/startup', methods=['GET'])
+def get_startup_report():
+    return jsonify(startup_report), 200
+
+@app.route('/api/ai/status', methods=['GET'])
+def get_ai_status():
+    return jsonify(ai_gateway.status()), 200
+
+@app.route('/api/db/indexes', methods=['GET'])
+def get_db_indexes():
+    # Declared indexes plus an explain of every known query shape
+    try:
+        return jsonify({
+            "bootstrap": db_indexes.status(),
+            "report": db_indexes.explain_report(app.config['db'])
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/ai/metrics', methods=['GET'])
+def get_ai_metrics():
+    # ?format=prometheus for scrapers; JSON otherwise
+    if request.args.get('format') == 'prometheus':
+        return Response(ai_metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+    return jsonify({"call_sites": ai_gateway.metrics()}), 200
+
 if __name__ == '__main__':
     if not os.path.exists(TEMP_AUDIO_DIR):
         os.makedirs(TEMP_AUDIO_DIR)
+    if WORKER_ROLE == 'transcription' or (
+            WORKER_ROLE != 'api' and os.environ.get('WHISPER_PRELOAD', '').lower() in ('1', 'true', 'yes')):
+        whisper_registry.preload()
     socketio.run(app, host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
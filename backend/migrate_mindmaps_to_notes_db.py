@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Migration script to move mindmap data from MONGO_DB_NAME into notes_app_db
+
+The mindmap controllers used to write to MONGO_DB_NAME while the notes and
+project controllers (and the project matcher) read notes_app_db, so projects
+created from the mindmap were never seen by project detection. The mindmaps
+now use notes_app_db; this copies what they stored in the old database.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo import MongoClient
+
+# Load environment variables if needed
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+MINDMAP_COLLECTIONS = ["projects", "personal_child_nodes", "real_estate_mindmaps", "mindmap_nodes"]
+
+
+def migrate_mindmaps_to_notes_db():
+    """Copy mindmap-written documents into notes_app_db, skipping _ids already there"""
+    try:
+        client = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+        source = client[os.environ.get('MONGO_DB_NAME', 'grandmagnum')]
+        target = client.notes_app_db
+        if source.name == target.name:
+            print("MONGO_DB_NAME is notes_app_db, nothing to migrate")
+            return True
+
+        print(f"Starting migration: Copying mindmap data from {source.name} to {target.name}...")
+        for name in MINDMAP_COLLECTIONS:
+            copied = 0
+            skipped = 0
+            for doc in source[name].find():
+                if target[name].find_one({"_id": doc["_id"]}, {"_id": 1}):
+                    skipped += 1
+                    continue
+                target[name].insert_one(doc)
+                copied += 1
+            print(f"{name}: copied {copied}, already present {skipped}")
+
+        print(f"\nMigration completed!")
+        print(f"The {source.name} copies were left in place; drop them once the mindmap looks right")
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("Mindmap Database Migration Script")
+    print("=" * 33)
+
+    success = migrate_mindmaps_to_notes_db()
+
+    if success:
+        print("\n✅ Migration completed successfully!")
+    else:
+        print("\n❌ Migration failed!")
+        sys.exit(1)
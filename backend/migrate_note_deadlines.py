@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Migration script to store every note deadline as a datetime (or null)
+
+Older writers saved deadlines as raw strings ("" or ISO text). Keyset cursors on
+`sort=deadline` compare within one BSON type, so those notes dropped out of
+later pages.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo import MongoClient
+
+from controllers.Notes import parse_deadline
+
+# Load environment variables if needed
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+
+def migrate_note_deadlines():
+    """Convert string deadlines to datetimes; unparseable ones become null"""
+    try:
+        client = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+        notes_collection = client.notes_app_db.notes
+
+        print("Starting migration: Normalizing note deadlines...")
+        notes = list(notes_collection.find({"deadline": {"$type": "string"}}, {"deadline": 1, "title": 1}))
+        print(f"Found {len(notes)} notes with string deadlines")
+
+        cleared = 0
+        for note in notes:
+            deadline = parse_deadline(note["deadline"])
+            notes_collection.update_one({"_id": note["_id"]}, {"$set": {"deadline": deadline}})
+            if deadline is None and note["deadline"]:
+                cleared += 1
+                print(f"Cleared unparseable deadline '{note['deadline']}' on: {note.get('title', 'Untitled')}")
+
+        print(f"\nMigration completed!")
+        print(f"Notes updated: {len(notes)}")
+        print(f"Unparseable deadlines cleared: {cleared}")
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        return False
+
+    return True
+
+if __name__ == "__main__":
+    print("Note Deadline Migration Script")
+    print("=" * 30)
+
+    success = migrate_note_deadlines()
+
+    if success:
+        print("\n✅ Migration completed successfully!")
+    else:
+        print("\n❌ Migration failed!")
+        sys.exit(1)
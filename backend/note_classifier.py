@@ -0,0 +1,173 @@
+"""Local note-type classifier ("daily task" vs "project").
+
+A multinomial naive Bayes model over word unigrams and bigrams, trained on the
+labelled ``type`` field of existing notes. It answers in microseconds without
+network access; callers fall back to Gemini when its confidence is low.
+The trained model is stored in MongoDB so every worker process shares it; its
+vocabulary is capped at ``NOTE_CLASSIFIER_MAX_VOCABULARY`` tokens so the
+document stays far below Mongo's 16 MB limit however many notes it learns from.
+"""
+import datetime
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+
+CONFIDENCE_THRESHOLD = float(os.environ.get('NOTE_CLASSIFIER_THRESHOLD', '0.85'))
+MIN_SAMPLES_PER_TYPE = int(os.environ.get('NOTE_CLASSIFIER_MIN_SAMPLES', '20'))
+RELOAD_SECONDS = float(os.environ.get('NOTE_CLASSIFIER_RELOAD_SECONDS', '300'))
+MAX_VOCABULARY = int(os.environ.get('NOTE_CLASSIFIER_MAX_VOCABULARY', '50000'))
+# Labels the app assigned itself (local model, provisional type, default on Gemini failure); never trained on
+UNTRUSTED_TYPE_SOURCES = ["local", "pending", "fallback"]
+MODEL_ID = "note_type_classifier"
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    words = _TOKEN.findall((text or "").lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NoteTypeClassifier:
+    def __init__(self, labels=None, doc_counts=None, token_counts=None, token_totals=None, vocabulary_size=0):
+        self.labels = labels or []
+        self.doc_counts = doc_counts or {}          # label -> number of training notes
+        self.token_counts = token_counts or {}      # label -> {token: count}
+        self.token_totals = token_totals or {}      # label -> total tokens
+        self.vocabulary_size = vocabulary_size
+
+    @classmethod
+    def fit(cls, texts, labels, max_vocabulary=MAX_VOCABULARY):
+        token_counts = {}
+        for text, label in zip(texts, labels):
+            token_counts.setdefault(label, Counter()).update(tokenize(text))
+        totals = Counter()
+        for counts in token_counts.values():
+            totals.update(counts)
+        # Keep the most frequent tokens; rare bigrams make up most of a large vocabulary and carry little signal
+        vocabulary = {token for token, _ in totals.most_common(max_vocabulary)} \
+            if max_vocabulary and len(totals) > max_vocabulary else set(totals)
+        token_counts = {label: Counter({token: count for token, count in counts.items() if token in vocabulary})
+                        for label, counts in token_counts.items()}
+        return cls(
+            labels=sorted(token_counts),
+            doc_counts=dict(Counter(labels)),
+            token_counts={label: dict(counts) for label, counts in token_counts.items()},
+            token_totals={label: sum(counts.values()) for label, counts in token_counts.items()},
+            vocabulary_size=len(vocabulary),
+        )
+
+    def predict(self, text):
+        """Return ``(label, confidence)``; confidence is the posterior probability of the label."""
+        if len(self.labels) < 2:
+            return None, 0.0
+        tokens = tokenize(text)
+        total_docs = sum(self.doc_counts.values())
+        scores = {}
+        for label in self.labels:
+            counts = self.token_counts[label]
+            denominator = self.token_totals[label] + self.vocabulary_size + 1
+            score = math.log(self.doc_counts[label] / total_docs)
+            for token in tokens:
+                # Laplace smoothing; unseen tokens contribute equally to every label
+                score += math.log((counts.get(token, 0) + 1) / denominator)
+            scores[label] = score
+        best = max(scores, key=scores.get)
+        normalizer = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1.0 / normalizer
+
+    def to_document(self):
+        return {
+            "labels": self.labels,
+            "doc_counts": self.doc_counts,
+            # Tokens are alphanumeric (plus a space in bigrams), so they are safe Mongo keys
+            "token_counts": self.token_counts,
+            "token_totals": self.token_totals,
+            "vocabulary_size": self.vocabulary_size,
+        }
+
+    @classmethod
+    def from_document(cls, doc):
+        return cls(
+            labels=doc["labels"],
+            doc_counts=doc["doc_counts"],
+            token_counts=doc["token_counts"],
+            token_totals=doc["token_totals"],
+            vocabulary_size=doc["vocabulary_size"],
+        )
+
+
+def training_data(db, note_types):
+    """Texts and labels from labelled notes, skipping labels the app assigned itself."""
+    texts, labels = [], []
+    cursor = db.notes.find(
+        {"type": {"$in": list(note_types)}, "type_source": {"$nin": UNTRUSTED_TYPE_SOURCES}},
+        {"title": 1, "description": 1, "type": 1}
+    )
+    for note in cursor:
+        text = f"{note.get('title', '')} {note.get('description', '')}".strip()
+        if text:
+            texts.append(text)
+            labels.append(note["type"])
+    return texts, labels
+
+
+def train_from_db(db, note_types):
+    """Train on the notes collection and store the model. Returns ``(classifier, counts)``."""
+    texts, labels = training_data(db, note_types)
+    counts = dict(Counter(labels))
+    if len(counts) < 2 or min(counts.values()) < MIN_SAMPLES_PER_TYPE:
+        raise ValueError(f"Not enough labelled notes to train (need {MIN_SAMPLES_PER_TYPE} per type, have {counts})")
+    classifier = NoteTypeClassifier.fit(texts, labels)
+    db.ml_models.replace_one(
+        {"_id": MODEL_ID},
+        {"_id": MODEL_ID, "model": classifier.to_document(), "samples": counts,
+         "trained_at": datetime.datetime.utcnow()},
+        upsert=True
+    )
+    return classifier, counts
+
+
+class LocalNoteClassifier:
+    """Per-process handle on the stored model, re-read every ``RELOAD_SECONDS`` to pick up retraining."""
+
+    def __init__(self, db, threshold=CONFIDENCE_THRESHOLD):
+        self.db = db
+        self.threshold = threshold
+        self._classifier = None
+        self._trained_at = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        def stale():
+            return self._checked_at is None or time.monotonic() - self._checked_at >= RELOAD_SECONDS
+
+        if not stale():
+            return self._classifier
+        with self._lock:
+            if stale():
+                self._checked_at = time.monotonic()
+                try:
+                    doc = self.db.ml_models.find_one({"_id": MODEL_ID}, {"trained_at": 1})
+                    if doc and doc.get("trained_at") != self._trained_at:
+                        doc = self.db.ml_models.find_one({"_id": MODEL_ID})
+                        self._classifier = NoteTypeClassifier.from_document(doc["model"])
+                        self._trained_at = doc.get("trained_at")
+                        print(f"🧮 Loaded note classifier trained at {self._trained_at}")
+                except Exception as e:
+                    print(f"⚠️ Could not load note classifier: {e}")
+        return self._classifier
+
+    def classify(self, text, threshold=None):
+        """Return the local label, or None when there is no model or it isn't confident enough."""
+        classifier = self._current()
+        if classifier is None:
+            return None
+        label, confidence = classifier.predict(text)
+        if label is None or confidence < (self.threshold if threshold is None else threshold):
+            return None
+        return label
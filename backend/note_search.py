@@ -0,0 +1,172 @@
+"""Prefix search over notes backed by an inverted index kept on each note.
+
+Every note stores ``search_keys``: the lowercased words of its title,
+description, tags and creator name plus their prefixes, under a multikey
+index. A search for "bud rev" becomes ``{"search_keys": {"$all": ["bud", "rev"]}}``,
+an index lookup that combines with the listing's other filters, instead of an
+unanchored regex scan. User input is only ever split into words, never
+interpreted as a pattern. Matches can be ranked by relevance: words in the
+title count most, then tags, creator and description, and whole-word hits
+count twice as much as prefix hits.
+
+Notes written before this existed are backfilled in the background at startup.
+"""
+import base64
+import json
+import os
+import re
+import threading
+
+from pagination import InvalidCursor, page_size, MAX_PAGE_SIZE
+
+MIN_PREFIX_CHARS = 2
+MAX_PREFIX_CHARS = int(os.environ.get('NOTE_SEARCH_MAX_PREFIX_CHARS', '15'))
+# Paged relevance ranking scores at most this many matches, the most recently updated
+MAX_RANKED_CANDIDATES = int(os.environ.get('NOTE_SEARCH_MAX_CANDIDATES', '1000'))
+BACKFILL_BATCH_SIZE = 500
+
+FIELD_WEIGHTS = {"title": 10, "tags": 5, "created_by_name": 3, "description": 1}
+SEARCH_FIELDS = tuple(FIELD_WEIGHTS)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    return _WORD.findall(str(text).lower()) if text else []
+
+
+def _field_words(note, field):
+    value = note.get(field)
+    if isinstance(value, list):
+        return [word for item in value for word in tokenize(item)]
+    return tokenize(value)
+
+
+def search_keys(note):
+    keys = set()
+    for field in SEARCH_FIELDS:
+        for word in _field_words(note, field):
+            keys.add(word[:MAX_PREFIX_CHARS])
+            for length in range(MIN_PREFIX_CHARS, min(len(word), MAX_PREFIX_CHARS) + 1):
+                keys.add(word[:length])
+    return sorted(keys)
+
+
+def with_search_keys(note):
+    """Copy of ``note`` ready to insert, so the caller's dict (often returned to the client) stays clean."""
+    return dict(note, search_keys=search_keys(note))
+
+
+def refresh(collection, note_id):
+    """Recompute one note's keys after an update touched its searchable fields."""
+    note = collection.find_one({"_id": note_id}, {field: 1 for field in SEARCH_FIELDS})
+    if note:
+        collection.update_one({"_id": note_id}, {"$set": {"search_keys": search_keys(note)}})
+
+
+def query_terms(search_query):
+    """Index keys for the words of a search box entry.
+
+    Single characters are too broad to add anything next to longer words and
+    are dropped; a search made only of single characters keeps them.
+    """
+    keys = []
+    for word in tokenize(search_query):
+        key = word[:MAX_PREFIX_CHARS]
+        if key not in keys:
+            keys.append(key)
+    return [key for key in keys if len(key) >= MIN_PREFIX_CHARS] or keys
+
+
+def match_filter(terms):
+    """Filter for ``query_terms``; no terms (a search with no words) matches nothing."""
+    if not terms:
+        return {"_id": {"$in": []}}
+    if all(len(term) >= MIN_PREFIX_CHARS for term in terms):
+        return {"search_keys": {"$all": terms}}
+    # Single-character prefixes aren't stored as keys; an anchored regex is still an index range scan
+    return {"$and": [{"search_keys": {"$regex": "^" + re.escape(term)}} for term in terms]}
+
+
+def score(note, terms):
+    total = 0.0
+    for term in terms:
+        best = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            for word in _field_words(note, field):
+                if word[:MAX_PREFIX_CHARS] == term:
+                    best = max(best, weight)
+                elif word.startswith(term):
+                    best = max(best, weight / 2)
+        total += best
+    return total
+
+
+def _encode_offset(terms, offset):
+    payload = json.dumps({"f": "relevance", "q": terms, "o": offset})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_offset(token, terms):
+    try:
+        position = json.loads(base64.urlsafe_b64decode((token + "=" * (-len(token) % 4)).encode("ascii")))
+        offset = int(position["o"])
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+    if position.get("f") != "relevance" or position.get("q") != terms or offset < 0:
+        raise InvalidCursor("Cursor was issued for a different search")
+    return offset
+
+
+def ranked_page(collection, query, terms, cursor=None, limit=None, projection=None):
+    """Return ``(docs, next_cursor)`` for matches ordered by relevance, most recently updated first on ties.
+
+    Without a page size every match is ranked and returned. Paged requests rank
+    only the ``MAX_RANKED_CANDIDATES`` most recently updated matches.
+    """
+    if not projection:
+        projection = {"search_keys": 0}
+    elif any(value != 0 for value in projection.values()):
+        # Inclusion projections must still carry what scoring reads
+        projection = dict(projection, **{field: 1 for field in SEARCH_FIELDS})
+    offset = _decode_offset(cursor, terms) if cursor else 0
+    size = page_size(limit) or (MAX_PAGE_SIZE if cursor else 0)
+    find = collection.find(query, projection).sort([("updated_at", -1), ("_id", -1)])
+    if size:
+        find = find.limit(MAX_RANKED_CANDIDATES)
+    ranked = sorted(find, key=lambda note: score(note, terms), reverse=True)
+    if not size:
+        return ranked, None
+    page = ranked[offset:offset + size]
+    next_cursor = _encode_offset(terms, offset + size) if offset + size < len(ranked) else None
+    return page, next_cursor
+
+
+def configure(collection):
+    """Create the ``search_keys`` index and backfill notes that predate it on a background thread."""
+    if collection is None:
+        return
+    try:
+        collection.create_index("search_keys", name="notes_search_keys")
+    except Exception as e:
+        print(f"⚠️ Could not create note search index: {e}")
+    threading.Thread(target=backfill, args=(collection,), name="note-search-backfill", daemon=True).start()
+
+
+def backfill(collection):
+    updated = 0
+    try:
+        while True:
+            notes = list(collection.find({"search_keys": {"$exists": False}},
+                                         {field: 1 for field in SEARCH_FIELDS}).limit(BACKFILL_BATCH_SIZE))
+            if not notes:
+                break
+            for note in notes:
+                collection.update_one({"_id": note["_id"]}, {"$set": {"search_keys": search_keys(note)}})
+            updated += len(notes)
+    except Exception as e:
+        print(f"⚠️ Note search backfill stopped after {updated} notes: {e}")
+        return updated
+    if updated:
+        print(f"🔎 Indexed {updated} existing notes for search")
+    return updated
@@ -0,0 +1,89 @@
+"""Keyset (cursor) pagination for sorted Mongo listings.
+
+A page is fetched with the caller's filter plus a predicate that only matches
+documents after the last one returned, in ``(sort_field, _id)`` order, so each
+page costs the same however deep the client has scrolled. The cursor handed to
+clients is an opaque token holding that last position.
+"""
+import base64
+import os
+
+from bson import json_util
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('NOTES_DEFAULT_PAGE_SIZE', '0'))
+MAX_PAGE_SIZE = int(os.environ.get('NOTES_MAX_PAGE_SIZE', '200'))
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_field, sort_dir, doc):
+    position = {"f": sort_field, "d": sort_dir, "v": doc.get(sort_field), "id": doc["_id"]}
+    return base64.urlsafe_b64encode(json_util.dumps(position).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token, sort_field, sort_dir):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json_util.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        value, last_id = position["v"], position["id"]
+    except Exception as e:
+        raise InvalidCursor(f"Invalid cursor: {e}") from e
+    if position.get("f") != sort_field or position.get("d") != sort_dir:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return value, last_id
+
+
+def after_filter(sort_field, sort_dir, value, last_id):
+    """Documents strictly after ``(value, last_id)`` in the given sort order.
+
+    Mongo sorts missing and null values before everything else, but range
+    operators never match them, so nulls get explicit clauses.
+    """
+    id_op = "$gt" if sort_dir == 1 else "$lt"
+    same_value_later_id = {sort_field: value, "_id": {id_op: last_id}}
+    if value is None:
+        if sort_dir == 1:
+            return {"$or": [same_value_later_id, {sort_field: {"$ne": None}}]}
+        return same_value_later_id
+    clauses = [{sort_field: {id_op: value}}, same_value_later_id]
+    if sort_dir == -1:
+        clauses.append({sort_field: None})
+    return {"$or": clauses}
+
+
+def page_size(raw):
+    """Requested page size clamped to ``MAX_PAGE_SIZE``; ``DEFAULT_PAGE_SIZE`` when absent (0 = unpaged)."""
+    if raw in (None, ""):
+        return min(DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE) if DEFAULT_PAGE_SIZE > 0 else 0
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        raise InvalidCursor(f"Invalid limit '{raw}'")
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def paginate(collection, query, sort_field, sort_dir, cursor=None, limit=None, projection=None):
+    """Return ``(docs, next_cursor)``; ``next_cursor`` is None on the last page.
+
+    ``limit`` is the raw page size from the request. A cursor without a limit
+    still pages, using ``MAX_PAGE_SIZE`` unless a default is configured.
+    """
+    size = page_size(limit)
+    if cursor:
+        size = size or MAX_PAGE_SIZE
+        value, last_id = decode_cursor(cursor, sort_field, sort_dir)
+        after = after_filter(sort_field, sort_dir, value, last_id)
+        query = {"$and": [query, after]} if query else after
+
+    find = collection.find(query, projection) if projection else collection.find(query)
+    find = find.sort([(sort_field, sort_dir), ("_id", sort_dir)])
+    if not size:
+        return list(find), None
+
+    docs = list(find.limit(size + 1))
+    if len(docs) <= size:
+        return docs, None
+    docs = docs[:size]
+    return docs, encode_cursor(sort_field, sort_dir, docs[-1])
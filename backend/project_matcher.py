@@ -0,0 +1,142 @@
+"""Multi-pattern project-name matching for project detection.
+
+Project names are compiled into an Aho-Corasick automaton so one pass over the
+text finds every mentioned project, however many projects a user has. Compiled
+matchers are cached per user and invalidated when that user's projects change;
+a short TTL bounds staleness across worker processes.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+MATCHER_TTL_SECONDS = float(os.environ.get('PROJECT_MATCHER_TTL_SECONDS', '60'))
+
+WORD_BOUNDARY_CONFIDENCE = 0.9
+SUBSTRING_CONFIDENCE = 0.8
+
+
+class AhoCorasick:
+    """Case-insensitive automaton over a list of patterns."""
+
+    def __init__(self, patterns):
+        self.patterns = [p.lower() for p in patterns]
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]     # state -> indexes of patterns ending here
+        for index, pattern in enumerate(self.patterns):
+            if pattern:
+                self._add(pattern, index)
+        self._build_failure_links()
+
+    def _add(self, pattern, index):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_all(self, text):
+        """Yield ``(start, end, pattern_index)`` for every occurrence, overlapping ones included."""
+        state = 0
+        for position, char in enumerate(text.lower()):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._output[state]:
+                yield position - len(self.patterns[index]) + 1, position + 1, index
+
+
+def _is_word_boundary(text, start, end):
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class ProjectMatcher:
+    def __init__(self, projects):
+        self.projects = projects
+        self.by_name = {}
+        for project in projects:
+            self.by_name.setdefault(project['name'].lower(), project)
+        self._automaton = AhoCorasick([project['name'] for project in projects])
+
+    def match(self, text):
+        """Return ``(matches, coverage)``.
+
+        ``matches`` has one entry per mentioned project, with the higher
+        confidence when any occurrence sits on word boundaries. ``coverage`` is
+        the share of the text's non-space characters inside word-boundary matches.
+        """
+        # Offsets from the automaton refer to the lowercased text
+        text = text.lower()
+        best = {}
+        covered = [False] * len(text)
+        for start, end, index in self._automaton.find_all(text):
+            project = self.projects[index]
+            on_boundary = _is_word_boundary(text, start, end)
+            confidence = WORD_BOUNDARY_CONFIDENCE if on_boundary else SUBSTRING_CONFIDENCE
+            key = str(project['_id'])
+            if key not in best or confidence > best[key]["confidence"]:
+                best[key] = {
+                    "name": project['name'],
+                    "id": key,
+                    "confidence": confidence,
+                    "type": "exact_match"
+                }
+            if on_boundary:
+                covered[start:end] = [True] * (end - start)
+        significant = [i for i, char in enumerate(text) if not char.isspace()]
+        coverage = sum(covered[i] for i in significant) / len(significant) if significant else 0.0
+        return list(best.values()), coverage
+
+
+class ProjectMatcherCache:
+    """Compiled matchers keyed by user (None for all users), rebuilt after invalidation or TTL."""
+
+    def __init__(self, ttl=MATCHER_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_email, load_projects):
+        with self._lock:
+            entry = self._entries.get(user_email)
+            if entry and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+            generation = self._generation
+        matcher = ProjectMatcher(load_projects())
+        with self._lock:
+            # Don't store a matcher built from projects that changed while it was compiling
+            if generation == self._generation:
+                self._entries[user_email] = (time.monotonic(), matcher)
+        return matcher
+
+    def invalidate(self, user_email=None):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_email, None)
+            # The unfiltered matcher contains every user's projects
+            self._entries.pop(None, None)
+
+
+matcher_cache = ProjectMatcherCache()
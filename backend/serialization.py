@@ -0,0 +1,89 @@
+"""JSON encoding of MongoDB documents for HTTP responses and Socket.IO events.
+
+Documents are encoded as they are: ObjectIds become strings and datetimes ISO
+8601 strings while the encoder runs, so controllers no longer walk and rewrite
+every document (in place) before ``jsonify``. orjson is used when installed,
+with the standard library as the fallback.
+"""
+import datetime
+import json
+import uuid
+
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal128, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(value, **kwargs):
+    kwargs.setdefault("separators", (",", ":"))
+    return json.dumps(value, default=_default, **kwargs)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(value):
+        try:
+            return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the standard library handles
+            return _stdlib_dumps(value).encode("utf-8")
+
+    def loads(value, **kwargs):
+        return orjson.loads(value) if not kwargs else json.loads(value, **kwargs)
+else:
+    def dumps_bytes(value):
+        return _stdlib_dumps(value).encode("utf-8")
+
+    loads = json.loads
+
+
+def dumps(value, **kwargs):
+    """``json.dumps`` replacement; ``separators`` is accepted (output is always compact), other options use the stdlib."""
+    kwargs.pop("separators", None)
+    if kwargs:
+        return _stdlib_dumps(value, **kwargs)
+    return dumps_bytes(value).decode("utf-8")
+
+
+def to_jsonable(value):
+    """A JSON-ready copy of ``value`` for code that needs plain data rather than encoded text."""
+    return loads(dumps_bytes(value))
+
+
+class MongoJSONProvider(JSONProvider):
+    """Flask JSON provider so ``jsonify`` encodes documents straight from MongoDB."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        return loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b"\n", mimetype="application/json")
+
+
+def install(app):
+    app.json_provider_class = MongoJSONProvider
+    app.json = MongoJSONProvider(app)
@@ -0,0 +1,39 @@
+import pytest
+
+from audio_processing import SAMPLE_RATE, TimestampMap
+
+
+def _map(*spans_in_seconds):
+    return TimestampMap([(int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)) for start, end in spans_in_seconds])
+
+
+def test_times_inside_a_span_are_shifted_by_the_removed_silence():
+    timestamps = _map((1, 3), (10, 12))
+    assert timestamps.duration == 4
+    assert timestamps.to_original(0.5) == 1.5
+    assert timestamps.to_original(2.5) == 10.5
+    assert timestamps.to_original(4) == 12
+
+
+def test_a_splice_starts_the_next_span_but_ends_the_previous_one():
+    timestamps = _map((1, 3), (10, 12))
+    assert timestamps.to_original(2) == 10
+    assert timestamps.to_original(2, end=True) == 3
+
+
+def test_repeated_span_starts_map_to_the_first_span():
+    # Zero-length spans share a stripped start with the span after them
+    timestamps = _map((1, 1), (5, 7))
+    assert timestamps.to_original(0) == 5
+    assert timestamps.to_original(0, end=True) == 1
+
+
+def test_empty_map_is_the_identity():
+    timestamps = TimestampMap([])
+    assert timestamps.duration == 0
+    assert timestamps.to_original(3.25) == 3.25
+
+
+@pytest.mark.parametrize("seconds", [0, 0.25, 1.999])
+def test_unstripped_audio_maps_to_itself(seconds):
+    assert _map((0, 2)).to_original(seconds) == pytest.approx(seconds)
@@ -0,0 +1,43 @@
+from controllers.Notes import merge_extracted_tasks
+
+
+def test_near_identical_titles_from_overlapping_chunks_merge():
+    merged = merge_extracted_tasks([
+        [{"title": "Send the budget review", "description": "Send it", "tags": ["finance"]}],
+        [{"title": "send the  budget reviews", "description": "Send it to the board by Friday",
+          "tags": ["finance", "board"], "deadline": "2024-05-03"}],
+    ])
+    assert merged == [{
+        "title": "Send the budget review",
+        "description": "Send it to the board by Friday",
+        "tags": ["finance", "board"],
+        "deadline": "2024-05-03",
+    }]
+
+
+def test_first_deadline_is_kept():
+    merged = merge_extracted_tasks([
+        [{"title": "Plan offsite", "deadline": "2024-06-01"}],
+        [{"title": "Plan offsite", "deadline": "2024-07-01"}],
+    ])
+    assert merged[0]["deadline"] == "2024-06-01"
+
+
+def test_string_tags_are_merged_as_lists():
+    merged = merge_extracted_tasks([[{"title": "Hire designer", "tags": "hiring"}],
+                                    [{"title": "Hire designer", "tags": "design"}]])
+    assert merged[0]["tags"] == ["hiring", "design"]
+
+
+def test_distinct_tasks_and_untitled_tasks_are_kept():
+    merged = merge_extracted_tasks([
+        [{"title": "Book venue"}, {"title": ""}],
+        [{"title": "Order catering"}, {"title": ""}, "not a task"],
+    ])
+    assert [task["title"] for task in merged] == ["Book venue", "", "Order catering", ""]
+
+
+def test_inputs_are_not_modified():
+    first = {"title": "Book venue", "tags": ["events"]}
+    merge_extracted_tasks([[first], [{"title": "Book venue", "tags": ["travel"]}]])
+    assert first == {"title": "Book venue", "tags": ["events"]}
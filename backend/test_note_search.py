@@ -0,0 +1,75 @@
+import datetime
+
+import pytest
+
+import note_search
+from pagination import InvalidCursor
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def _collection(titles):
+    collection = mongomock.MongoClient().db.notes
+    base = datetime.datetime(2024, 1, 1)
+    for i, title in enumerate(titles):
+        collection.insert_one(note_search.with_search_keys(
+            {"title": title, "description": "", "updated_at": base + datetime.timedelta(days=i)}))
+    return collection
+
+
+def _search(collection, search_query, **kwargs):
+    terms = note_search.query_terms(search_query)
+    query = note_search.match_filter(terms)
+    docs, next_cursor = note_search.ranked_page(collection, query, terms, **kwargs)
+    return [doc["title"] for doc in docs], next_cursor
+
+
+def test_whole_word_title_match_ranks_first():
+    collection = _collection(["Budgeting notes", "Budget", "Other"])
+    titles, _ = _search(collection, "budget")
+    assert titles == ["Budget", "Budgeting notes"]
+
+
+def test_ties_are_most_recently_updated_first():
+    collection = _collection(["Budget one", "Budget two", "Budget three"])
+    titles, _ = _search(collection, "budget")
+    assert titles == ["Budget three", "Budget two", "Budget one"]
+
+
+def test_cursor_pages_through_the_ranking():
+    collection = _collection([f"Budget {i}" for i in range(5)])
+    first, cursor = _search(collection, "budget", limit="2")
+    second, cursor = _search(collection, "budget", limit="2", cursor=cursor)
+    third, cursor = _search(collection, "budget", limit="2", cursor=cursor)
+    assert cursor is None
+    assert first + second + third == _search(collection, "budget")[0]
+
+
+def test_unpaged_search_is_not_capped(monkeypatch):
+    monkeypatch.setattr(note_search, "MAX_RANKED_CANDIDATES", 2)
+    collection = _collection([f"Budget {i}" for i in range(5)])
+    assert len(_search(collection, "budget")[0]) == 5
+    titles, cursor = _search(collection, "budget", limit="10")
+    assert titles == ["Budget 4", "Budget 3"]
+    assert cursor is None
+
+
+def test_cursor_from_another_search_is_rejected():
+    collection = _collection(["Budget review", "Budget plan", "Review"])
+    _, cursor = _search(collection, "budget", limit="1")
+    with pytest.raises(InvalidCursor):
+        _search(collection, "review", limit="1", cursor=cursor)
+
+
+def test_single_character_words_match_as_prefixes():
+    collection = _collection(["Budget review", "x ray", "Other"])
+    assert note_search.query_terms("b r") == ["b", "r"]
+    assert _search(collection, "b r")[0] == ["Budget review"]
+    # Next to a longer word a single character is dropped
+    assert note_search.query_terms("a budget") == ["budget"]
+
+
+def test_search_without_words_matches_nothing():
+    collection = _collection(["Budget review"])
+    assert note_search.query_terms("!!!") == []
+    assert _search(collection, "!!!")[0] == []
@@ -1,4 +1,5 @@
 from controllers.Notes import NotesController
+import ai_gateway
 import os
 
 # Set a test API key
@@ -16,7 +17,7 @@ with open(output_file, 'w') as f:
         f.write("Starting NotesController initialization...\n")
         notes = NotesController(db)
         f.write('NotesController initialized successfully\n')
-        f.write(f'Gemini initialized: {notes.genai is not None}\n')
+        f.write(f'Gemini initialized: {ai_gateway.is_configured()}\n')
         
     except Exception as e:
         f.write(f"Error initializing NotesController: {e}\n")
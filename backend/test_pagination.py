@@ -0,0 +1,59 @@
+import datetime
+
+import pytest
+from bson import ObjectId
+
+from pagination import after_filter, paginate
+
+mongomock = pytest.importorskip("mongomock")
+
+
+def _notes_with_null_deadlines():
+    collection = mongomock.MongoClient().db.notes
+    base = datetime.datetime(2024, 1, 1)
+    for i in range(9):
+        note = {"_id": ObjectId(), "title": f"note {i}"}
+        if i % 3 == 0:
+            note["deadline"] = None
+        elif i % 3 == 1:
+            note["deadline"] = base + datetime.timedelta(days=i // 2)
+        else:
+            note["deadline"] = base + datetime.timedelta(days=1)
+        collection.insert_one(note)
+    return collection
+
+
+def _walk(collection, sort_dir, limit):
+    seen, cursor = [], None
+    while True:
+        docs, cursor = paginate(collection, {}, "deadline", sort_dir, cursor=cursor, limit=limit)
+        seen.extend(doc["_id"] for doc in docs)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("sort_dir", [1, -1])
+@pytest.mark.parametrize("limit", ["1", "2", "4"])
+def test_pages_cover_null_sort_keys_exactly_once(sort_dir, limit):
+    collection = _notes_with_null_deadlines()
+    expected = [doc["_id"] for doc in collection.find().sort([("deadline", sort_dir), ("_id", sort_dir)])]
+    assert _walk(collection, sort_dir, limit) == expected
+
+
+def test_after_null_ascending_includes_every_non_null():
+    last_id = ObjectId()
+    assert after_filter("deadline", 1, None, last_id) == {"$or": [
+        {"deadline": None, "_id": {"$gt": last_id}},
+        {"deadline": {"$ne": None}},
+    ]}
+
+
+def test_after_null_descending_only_continues_the_nulls():
+    last_id = ObjectId()
+    assert after_filter("deadline", -1, None, last_id) == {"deadline": None, "_id": {"$lt": last_id}}
+
+
+def test_after_value_descending_reaches_the_nulls():
+    last_id = ObjectId()
+    assert {"deadline": None} in after_filter("deadline", -1, 5, last_id)["$or"]
+    assert {"deadline": None} not in after_filter("deadline", 1, 5, last_id)["$or"]
@@ -0,0 +1,46 @@
+from project_matcher import AhoCorasick, ProjectMatcher, SUBSTRING_CONFIDENCE, WORD_BOUNDARY_CONFIDENCE
+
+
+def _occurrences(patterns, text):
+    automaton = AhoCorasick(patterns)
+    return sorted((start, end, automaton.patterns[index]) for start, end, index in automaton.find_all(text))
+
+
+def test_overlapping_and_nested_patterns_are_all_found():
+    assert _occurrences(["he", "she", "his", "hers"], "ushers") == [
+        (1, 4, "she"), (2, 4, "he"), (2, 6, "hers"),
+    ]
+
+
+def test_repeated_overlapping_occurrences():
+    assert _occurrences(["aa"], "aaaa") == [(0, 2, "aa"), (1, 3, "aa"), (2, 4, "aa")]
+
+
+def test_matching_is_case_insensitive():
+    assert _occurrences(["Apollo"], "the APOLLO launch") == [(4, 10, "apollo")]
+
+
+def test_empty_pattern_is_ignored():
+    assert _occurrences(["", "crm"], "new crm") == [(4, 7, "crm")]
+
+
+def test_boundary_match_beats_substring_match_of_the_same_project():
+    matcher = ProjectMatcher([{"_id": 1, "name": "Atlas"}])
+    matches, _ = matcher.match("Atlassian work, then Atlas review")
+    assert [(m["name"], m["confidence"]) for m in matches] == [("Atlas", WORD_BOUNDARY_CONFIDENCE)]
+
+
+def test_nested_project_names_both_match():
+    matcher = ProjectMatcher([{"_id": 1, "name": "CRM"}, {"_id": 2, "name": "CRM Migration"}])
+    matches, coverage = matcher.match("CRM Migration")
+    assert {m["name"]: m["confidence"] for m in matches} == {
+        "CRM": WORD_BOUNDARY_CONFIDENCE, "CRM Migration": WORD_BOUNDARY_CONFIDENCE,
+    }
+    assert coverage == 1.0
+
+
+def test_substring_only_match_does_not_count_as_coverage():
+    matcher = ProjectMatcher([{"_id": 1, "name": "Atlas"}])
+    matches, coverage = matcher.match("Atlassian")
+    assert matches[0]["confidence"] == SUBSTRING_CONFIDENCE
+    assert coverage == 0.0
@@ -0,0 +1,42 @@
+import pytest
+
+from text_chunking import chunk_text, estimate_tokens
+
+SENTENCES = [f"Sentence number {i} talks about the quarterly budget review." for i in range(40)]
+TEXT = " ".join(SENTENCES)
+
+
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(40, 0), (60, 20), (200, 50)])
+def test_chunks_stay_within_the_budget(max_tokens, overlap_tokens):
+    chunks = chunk_text(TEXT, max_tokens, overlap_tokens)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= max_tokens for chunk in chunks)
+
+
+def test_chunks_keep_whole_sentences_in_order():
+    chunks = chunk_text(TEXT, 60)
+    assert " ".join(chunks) == TEXT
+
+
+def test_overlap_repeats_the_previous_chunks_last_sentence():
+    chunks = chunk_text(TEXT, 60, overlap_tokens=20)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        last_sentence = previous.rsplit(". ", 1)[-1]
+        assert chunk.startswith(last_sentence)
+
+
+def test_overlap_never_pushes_a_chunk_over_the_budget():
+    chunks = chunk_text(TEXT, 30, overlap_tokens=30)
+    assert all(estimate_tokens(chunk) <= 30 for chunk in chunks)
+
+
+def test_unpunctuated_text_is_cut_at_word_boundaries():
+    words = [f"word{i}" for i in range(500)]
+    chunks = chunk_text(" ".join(words), 25)
+    assert all(estimate_tokens(chunk) <= 25 for chunk in chunks)
+    assert " ".join(chunks).split() == words
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("Just one sentence.", 100) == ["Just one sentence."]
+    assert chunk_text("", 100) == []
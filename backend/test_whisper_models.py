@@ -0,0 +1,54 @@
+import pytest
+
+import whisper_models
+from whisper_models import select_model
+
+
+@pytest.fixture(autouse=True)
+def default_tiers(monkeypatch):
+    monkeypatch.setattr(whisper_models, "MODEL_TIERS", ["tiny", "base", "small", "medium", "large"])
+    monkeypatch.setattr(whisper_models, "DEFAULT_QUALITY", "high")
+    monkeypatch.setattr(whisper_models, "QUALITY_TIERS", {"fast": "small", "balanced": "medium", "high": "large"})
+    monkeypatch.setattr(whisper_models, "QUALITY_FLOORS", {"fast": "tiny", "balanced": "base", "high": "medium"})
+    monkeypatch.setattr(whisper_models, "DURATION_CAPS", [(15, "base"), (120, "small")])
+    monkeypatch.setattr(whisper_models, "BACKLOG_STEP_DOWN", 2)
+
+
+def test_quality_sets_the_starting_tier():
+    assert select_model()[0] == "large"
+    assert select_model(quality="balanced")[0] == "medium"
+    assert select_model(quality="fast")[0] == "small"
+
+
+def test_short_clips_are_capped():
+    assert select_model(duration=10) == ("base", "quality=high, duration=10s")
+    assert select_model(duration=60)[0] == "small"
+    assert select_model(duration=600)[0] == "large"
+
+
+def test_backlog_steps_down_one_tier_per_step():
+    assert select_model(queue_depth=1)[0] == "large"
+    assert select_model(queue_depth=2) == ("medium", "quality=high, queue_depth=2")
+    assert select_model(queue_depth=2, quality="balanced")[0] == "small"
+    assert select_model(queue_depth=4, quality="balanced")[0] == "base"
+
+
+def test_backlog_never_steps_below_the_quality_floor():
+    assert select_model(queue_depth=100)[0] == "medium"
+    assert select_model(queue_depth=100, quality="balanced")[0] == "base"
+    assert select_model(queue_depth=100, quality="fast")[0] == "tiny"
+
+
+def test_backlog_does_not_raise_a_duration_capped_tier():
+    assert select_model(duration=10, queue_depth=100)[0] == "base"
+
+
+def test_requested_model_wins():
+    assert select_model(quality="fast", queue_depth=100, requested="large") == ("large", "requested")
+
+
+def test_unknown_names_are_rejected():
+    with pytest.raises(ValueError):
+        select_model(requested="huge")
+    with pytest.raises(ValueError):
+        select_model(quality="best")
@@ -0,0 +1,72 @@
+"""Sentence-aware text chunking sized to an LLM token budget."""
+import re
+
+# Gemini does not ship a local tokenizer; ~4 characters per token is close enough for English text
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+def estimate_tokens_for_chars(chars):
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_tokens(text):
+    return estimate_tokens_for_chars(len(text))
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def _split_long_sentence(sentence, max_tokens):
+    # A "sentence" longer than the budget (unpunctuated transcripts) is cut at word boundaries
+    # Track the joined length as words are added rather than re-joining the piece each time
+    pieces, current, current_chars = [], [], 0
+    for word in sentence.split():
+        joined_chars = current_chars + 1 + len(word) if current else len(word)
+        if current and estimate_tokens_for_chars(joined_chars) > max_tokens:
+            pieces.append(" ".join(current))
+            current, joined_chars = [], len(word)
+        current.append(word)
+        current_chars = joined_chars
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_text(text, max_tokens, overlap_tokens=0):
+    """Pack whole sentences into chunks of at most ``max_tokens``.
+
+    With ``overlap_tokens`` each chunk starts with the trailing sentences of the
+    previous one (up to that many tokens) so context spanning a boundary is
+    seen whole by at least one chunk.
+    """
+    sentences = []
+    for sentence in split_sentences(text):
+        if estimate_tokens(sentence) > max_tokens:
+            sentences.extend(_split_long_sentence(sentence, max_tokens))
+        else:
+            sentences.append(sentence)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence) + 1
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            carried, carried_tokens = [], 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous) + 1
+                if carried_tokens + previous_tokens > overlap_tokens or \
+                        carried_tokens + previous_tokens + tokens > max_tokens:
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous_tokens
+            current, current_tokens = carried, carried_tokens
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
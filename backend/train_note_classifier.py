@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Retrain the local note-type classifier from the labelled notes in MongoDB.
+
+Usage:
+    python train_note_classifier.py [--holdout 0.2]
+
+Running workers pick up the new model within NOTE_CLASSIFIER_RELOAD_SECONDS.
+"""
+import argparse
+import os
+import random
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pymongo import MongoClient
+
+from controllers.Notes import NOTE_TYPES
+from note_classifier import CONFIDENCE_THRESHOLD, NoteTypeClassifier, train_from_db, training_data
+
+
+def evaluate(db, holdout):
+    """Accuracy and coverage of a model trained on the rest, measured on a random holdout."""
+    texts, labels = training_data(db, NOTE_TYPES)
+    samples = list(zip(texts, labels))
+    random.Random(0).shuffle(samples)
+    split = int(len(samples) * (1 - holdout))
+    train, test = samples[:split], samples[split:]
+    if not train or not test:
+        print("Not enough notes for a holdout evaluation")
+        return
+    classifier = NoteTypeClassifier.fit([t for t, _ in train], [l for _, l in train])
+    confident = correct = 0
+    for text, label in test:
+        predicted, confidence = classifier.predict(text)
+        if confidence >= CONFIDENCE_THRESHOLD:
+            confident += 1
+            correct += predicted == label
+    print(f"Holdout: {len(test)} notes, {confident / len(test):.0%} answered locally "
+          f"(confidence >= {CONFIDENCE_THRESHOLD}), {correct / max(confident, 1):.1%} of those correct")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of notes held out for evaluation (0 to skip)")
+    args = parser.parse_args()
+
+    client = MongoClient(os.environ.get('MONGO_URI', 'mongodb://localhost:27017'))
+    db = client.notes_app_db
+
+    if args.holdout > 0:
+        evaluate(db, args.holdout)
+    try:
+        classifier, counts = train_from_db(db, NOTE_TYPES)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Note classifier trained on {sum(counts.values())} notes {counts} "
+          f"({classifier.vocabulary_size} features)")
+
+
+if __name__ == "__main__":
+    main()
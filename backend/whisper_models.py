@@ -0,0 +1,297 @@
+"""Process-wide registry of loaded Whisper models.
+
+Each configured model is loaded at most ``WHISPER_POOL_SIZE`` times per worker
+process and handed out to requests one slot at a time, so concurrent uploads
+wait for a free model instead of each loading their own copy. At most
+``WHISPER_MAX_LOADED_MODELS`` instances are resident across all tiers; loading
+another evicts the least recently used idle one. ``whisper`` and
+``torch`` are imported when the first model loads, not at module import, so
+API workers that never transcribe don't pay for them.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_MODEL = os.environ.get('WHISPER_MODEL', 'large')
+POOL_SIZE = int(os.environ.get('WHISPER_POOL_SIZE', '1'))
+MAX_LOADED_MODELS = int(os.environ.get('WHISPER_MAX_LOADED_MODELS', '2'))
+ACQUIRE_TIMEOUT = float(os.environ.get('WHISPER_ACQUIRE_TIMEOUT', '900'))
+
+# Model tiers from fastest to most accurate
+MODEL_TIERS = [name.strip() for name in
+               os.environ.get('WHISPER_MODEL_TIERS', 'tiny,base,small,medium,large').split(',') if name.strip()]
+DEFAULT_QUALITY = os.environ.get('WHISPER_DEFAULT_QUALITY', 'high')
+QUALITY_TIERS = {"fast": "small", "balanced": "medium", "high": "large"}
+# Backlog step-down never goes below these tiers
+QUALITY_FLOORS = {"fast": "tiny", "balanced": "base", "high": "medium"}
+# Short clips never need more than these tiers: (max duration in seconds, tier)
+DURATION_CAPS = [(15, "base"), (120, "small")]
+BACKLOG_STEP_DOWN = int(os.environ.get('WHISPER_BACKLOG_STEP_DOWN', '2'))
+
+# Inference backend: "default" (fp32/fp16 PyTorch) or "int8" (dynamically quantized Linear layers, CPU only)
+BACKEND = os.environ.get('WHISPER_BACKEND', 'default')
+DEVICE = os.environ.get('WHISPER_DEVICE', 'cpu')
+TORCH_THREADS = int(os.environ.get('WHISPER_TORCH_THREADS', '0'))
+INTEROP_THREADS = int(os.environ.get('WHISPER_INTEROP_THREADS', '0'))
+
+
+class ModelBusyError(Exception):
+    """Raised when no model slot frees up within the acquire timeout."""
+
+
+def process_rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss is the peak, in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return None
+
+
+def _model_bytes(model):
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except Exception:
+        return None
+
+
+_threads_configured = False
+
+
+def configure_torch_threads(threads=TORCH_THREADS, interop_threads=INTEROP_THREADS):
+    """Pin torch's intra-op and inter-op thread pools for this worker process (once)."""
+    global _threads_configured
+    if _threads_configured:
+        return
+    import torch
+    if threads > 0:
+        torch.set_num_threads(threads)
+    if interop_threads > 0:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Only allowed before the first parallel op in the process
+            print(f"⚠️ Could not set torch inter-op threads: {e}")
+    _threads_configured = True
+    print(f"🧵 torch using {torch.get_num_threads()} intra-op / {torch.get_num_interop_threads()} inter-op threads")
+
+
+def _quantize_int8(model):
+    import torch
+    # Whisper's Linear subclass only adds dtype casting; quantize_dynamic needs plain nn.Linear
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_model(name, backend=None, device=None):
+    """Load a Whisper model for the configured inference backend."""
+    backend = backend or BACKEND
+    device = device or DEVICE
+    if backend not in ("default", "int8"):
+        raise ValueError(f"Unknown Whisper backend '{backend}'")
+    import whisper
+    if device == "cpu":
+        configure_torch_threads()
+    model = whisper.load_model(name, device=device)
+    if backend == "int8":
+        if device != "cpu":
+            raise ValueError("The int8 Whisper backend only runs on CPU")
+        model = _quantize_int8(model)
+    return model
+
+
+def transcribe_options(device=None):
+    """Extra ``model.transcribe`` arguments for the configured device."""
+    # fp16 is unsupported on CPU and whisper would only warn and fall back per call
+    return {"fp16": False} if (device or DEVICE) == "cpu" else {}
+
+
+def select_model(duration=None, quality=None, queue_depth=0, requested=None):
+    """Pick a Whisper tier for one recording. Returns ``(model_name, reason)``.
+
+    An explicitly requested tier always wins. Otherwise the requested quality
+    sets the starting tier, short clips are capped to small models, and every
+    ``BACKLOG_STEP_DOWN`` jobs waiting in the queue drop one tier, down to the
+    quality's floor.
+    """
+    if requested:
+        if requested not in MODEL_TIERS:
+            raise ValueError(f"Unknown Whisper model '{requested}', expected one of {MODEL_TIERS}")
+        return requested, "requested"
+
+    quality = quality or DEFAULT_QUALITY
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality '{quality}', expected one of {list(QUALITY_TIERS)}")
+
+    def tier_index(name):
+        return MODEL_TIERS.index(name) if name in MODEL_TIERS else len(MODEL_TIERS) - 1
+
+    index = tier_index(QUALITY_TIERS[quality])
+    reasons = [f"quality={quality}"]
+    if duration is not None:
+        for max_seconds, cap in DURATION_CAPS:
+            if duration <= max_seconds:
+                if tier_index(cap) < index:
+                    index = tier_index(cap)
+                    reasons.append(f"duration={duration:.0f}s")
+                break
+    if BACKLOG_STEP_DOWN > 0 and queue_depth >= BACKLOG_STEP_DOWN:
+        steps = queue_depth // BACKLOG_STEP_DOWN
+        stepped = max(min(index, tier_index(QUALITY_FLOORS[quality])), index - steps)
+        if stepped < index:
+            index = stepped
+            reasons.append(f"queue_depth={queue_depth}")
+    return MODEL_TIERS[index], ", ".join(reasons)
+
+
+class WhisperModelRegistry:
+    def __init__(self, pool_size=POOL_SIZE, loader=None, max_loaded=MAX_LOADED_MODELS):
+        self.pool_size = max(1, pool_size)
+        self.max_loaded = max(self.pool_size, max_loaded)
+        self._loader = loader or load_model
+        self._cond = threading.Condition()
+        self._idle = {}     # model name -> list of (released_at, instance), oldest first
+        self._state = {}    # model name -> load/usage info
+
+    def _state_for(self, name):
+        state = self._state.get(name)
+        if state is None:
+            state = {
+                "status": "not_loaded",
+                "instances": 0,
+                "loading": 0,
+                "in_use": 0,
+                "waiting": 0,
+                "load_seconds": None,
+                "loaded_at": None,
+                "model_bytes": None,
+                "evictions": 0,
+                "error": None,
+            }
+            self._state[name] = state
+            self._idle[name] = []
+        return state
+
+    def _load(self, name):
+        print(f'🧠 Loading Whisper model "{name}"...')
+        started = time.monotonic()
+        model = self._loader(name)
+        elapsed = time.monotonic() - started
+        print(f'✅ Whisper model "{name}" loaded in {elapsed:.1f}s')
+        return model, elapsed
+
+    def _resident(self):
+        return sum(state["instances"] + state["loading"] for state in self._state.values())
+
+    def _evict_idle(self):
+        """Drop the least recently used idle instance of any model. Caller holds the lock."""
+        candidates = [(idle[0][0], name) for name, idle in self._idle.items() if idle]
+        if not candidates:
+            return False
+        _, name = min(candidates)
+        self._idle[name].pop(0)
+        state = self._state[name]
+        state["instances"] -= 1
+        state["evictions"] += 1
+        if not state["instances"] and not state["loading"]:
+            state["status"] = "not_loaded"
+        print(f'♻️ Evicted idle Whisper model "{name}"')
+        return True
+
+    def acquire(self, name=None, timeout=ACQUIRE_TIMEOUT):
+        """Take a model slot, loading a new instance if the pool and the resident cap allow."""
+        name = name or DEFAULT_MODEL
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            state = self._state_for(name)
+            state["waiting"] += 1
+            try:
+                while True:
+                    if self._idle[name]:
+                        state["in_use"] += 1
+                        return self._idle[name].pop()[1]
+                    if state["instances"] + state["loading"] < self.pool_size and (
+                            self._resident() < self.max_loaded or self._evict_idle()):
+                        state["loading"] += 1
+                        state["status"] = "loading"
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ModelBusyError(f'No free Whisper "{name}" slot after {timeout:.0f}s')
+                    self._cond.wait(remaining)
+            finally:
+                state["waiting"] -= 1
+
+        # Load outside the lock so other models stay available meanwhile
+        try:
+            model, elapsed = self._load(name)
+        except Exception as e:
+            with self._cond:
+                state["loading"] -= 1
+                state["status"] = "loaded" if state["instances"] else "error"
+                state["error"] = str(e)
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            state["loading"] -= 1
+            state["instances"] += 1
+            state["in_use"] += 1
+            state["status"] = "loaded"
+            state["error"] = None
+            state["load_seconds"] = round(elapsed, 2)
+            state["loaded_at"] = time.time()
+            if state["model_bytes"] is None:
+                state["model_bytes"] = _model_bytes(model)
+        return model
+
+    def release(self, name, model):
+        name = name or DEFAULT_MODEL
+        with self._cond:
+            state = self._state_for(name)
+            state["in_use"] -= 1
+            self._idle[name].append((time.monotonic(), model))
+            self._cond.notify_all()
+
+    @contextmanager
+    def model(self, name=None, timeout=ACQUIRE_TIMEOUT):
+        """Context manager yielding a model slot for the duration of a transcription."""
+        name = name or DEFAULT_MODEL
+        model = self.acquire(name, timeout)
+        try:
+            yield model
+        finally:
+            self.release(name, model)
+
+    def preload(self, names=None):
+        for name in names or [DEFAULT_MODEL]:
+            with self.model(name):
+                pass
+
+    def status(self):
+        with self._cond:
+            models = {name: dict(state) for name, state in self._state.items()}
+        return {
+            "default_model": DEFAULT_MODEL,
+            "backend": BACKEND,
+            "device": DEVICE,
+            "pool_size": self.pool_size,
+            "max_loaded_models": self.max_loaded,
+            "process_rss_bytes": process_rss_bytes(),
+            "models": models,
+        }
+
+
+registry = WhisperModelRegistry()
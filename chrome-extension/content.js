@@ -47,8 +47,8 @@
           })
             .then(res => res.json())
             .then(data => {
-              console.log('Transcription complete:', data);
-              showStatus('Transcription complete!');
+              console.log('Transcription response:', data);
+              showStatus(data.status === 'queued' ? 'Transcription started!' : 'Transcription complete!');
             })
             .catch(err => {
               console.error('Transcription upload failed:', err);
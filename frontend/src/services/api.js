@@ -788,6 +788,8 @@ export const transcribeAudioWithWhisper = async (audioBlob, endpoint = '/upload_
   
   const formData = new FormData();
   formData.append('audio', audioBlob, 'recording.webm');
+  // Wait for the transcript; uploads are queued and answered with a job id by default
+  formData.append('async', '0');
   
   try {
     console.log(`Sending request to ${API_URL}${endpoint}`);
@@ -843,6 +845,7 @@ export const getAiResponse = async (text) => {
 
 export const processAudio = async (formData) => {
   try {
+    if (!formData.has('async')) formData.append('async', '0');
     const response = await fetch(`${API_URL}/upload_audio`, {
       method: 'POST',
       body: formData